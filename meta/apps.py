@@ -0,0 +1,28 @@
+from django.apps import AppConfig, apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.translation import gettext_lazy as _
+
+
+class MetaAppConfig(AppConfig):
+    name = "meta"
+    verbose_name = _("django meta")
+
+    def ready(self):
+        from .cache import invalidate_on_m2m_changed, invalidate_on_save
+        from .models import ModelMeta
+        from .sites import clear_site_domains
+
+        if apps.is_installed("django.contrib.sites"):
+            Site = apps.get_model("sites.Site")
+            post_save.connect(clear_site_domains, sender=Site, dispatch_uid="meta_site_domains_save")
+            post_delete.connect(clear_site_domains, sender=Site, dispatch_uid="meta_site_domains_delete")
+
+        for model in apps.get_models():
+            if not issubclass(model, ModelMeta):
+                continue
+            post_save.connect(invalidate_on_save, sender=model, dispatch_uid="meta_cache_save")
+            post_delete.connect(invalidate_on_save, sender=model, dispatch_uid="meta_cache_delete")
+            for field in model._meta.local_many_to_many:
+                m2m_changed.connect(
+                    invalidate_on_m2m_changed, sender=field.remote_field.through, dispatch_uid="meta_cache_m2m"
+                )
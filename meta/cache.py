@@ -0,0 +1,339 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from time import monotonic
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import get_language
+
+from .settings import get_config
+
+CACHE_KEY_PREFIX = "django_meta"
+
+
+def get_cache():
+    """
+    Retrieve the cache backend configured by :ref:`META_CACHE_ALIAS`
+    """
+    return caches[get_config().cache_alias]
+
+
+def get_version_key(local_key):
+    """
+    Cache key of the current version of the object cached data.
+
+    Deleting the version key invalidates all the cached entries of the object.
+
+    :param local_key: object key as returned by :py:attr:`~meta.models.ModelMeta._local_key`
+    :return: cache key
+    """
+    return "{}:version:{}".format(CACHE_KEY_PREFIX, local_key)
+
+
+def get_dependents_key(local_key):
+    """
+    Cache key of the set of objects whose cached metadata include the object (e.g.: the posts of a publisher).
+
+    :param local_key: object key as returned by :py:attr:`~meta.models.ModelMeta._local_key`
+    :return: cache key
+    """
+    return "{}:dependents:{}".format(CACHE_KEY_PREFIX, local_key)
+
+
+def get_cache_context(request=None):
+    """
+    Identify the context the metadata are built for: current language, site and protocol.
+
+    :param request: optional request object
+    :return: string
+    """
+    if request is not None:
+        site = request.get_host()
+        protocol = request.scheme
+    else:
+        config = get_config()
+        site = getattr(settings, "SITE_ID", "") if config.use_sites else config.site_domain
+        protocol = config.site_protocol
+    return "{}:{}:{}".format(get_language(), site, protocol)
+
+
+def get_cache_key(obj, request=None):
+    """
+    Cache key of the object metadata for the current language, site and protocol.
+
+    :param obj: :py:class:`~meta.models.ModelMeta` instance
+    :param request: optional request object
+    :return: cache key
+    """
+    context = get_cache_context(request)
+    return "{}:meta:{}:{}".format(CACHE_KEY_PREFIX, obj._local_key, hashlib.md5(context.encode("utf-8")).hexdigest())
+
+
+def get_cached_meta(obj, request=None):
+    """
+    Retrieve the cached metadata of the object.
+
+    The current version of the object data is returned as well, and must be passed to :py:func:`set_cached_meta`
+    when storing newly computed data: this way data computed while the object is being invalidated is never
+    considered valid.
+
+    :param obj: :py:class:`~meta.models.ModelMeta` instance
+    :param request: optional request object
+    :return: tuple of cached value (``None`` if missing) and the object data version
+    """
+    return get_cached_meta_many([obj], request)[0]
+
+
+def get_cached_meta_many(objs, request=None):
+    """
+    Retrieve the cached metadata of the objects with a single cache lookup, see :py:func:`get_cached_meta`
+
+    :param objs: list of :py:class:`~meta.models.ModelMeta` instances
+    :param request: optional request object
+    :return: list of tuples of cached value (``None`` if missing) and object data version
+    """
+    cache = get_cache()
+    keys = [(get_cache_key(obj, request), get_version_key(obj._local_key)) for obj in objs]
+    values = cache.get_many([key for pair in keys for key in pair])
+    results = []
+    for key, version_key in keys:
+        version = values.get(version_key)
+        entry = values.get(key)
+        if version is not None and entry is not None and entry[0] == version:
+            results.append((entry[1], version))
+            continue
+        if version is None:
+            version = uuid4().hex
+            if cache.add(version_key, version, None):
+                values[version_key] = version
+            else:
+                version = values[version_key] = cache.get(version_key)
+        results.append((None, version))
+    return results
+
+
+def set_cached_meta(obj, request, value, version, dependencies=()):
+    """
+    Store the object metadata in the cache
+
+    The object is recorded as dependent of the objects included in its schema, so that its cached metadata
+    are invalidated when any of them changes (see :py:func:`invalidate_keys`).
+
+    :param obj: :py:class:`~meta.models.ModelMeta` instance
+    :param request: optional request object
+    :param value: data to store
+    :param version: object data version as returned by :py:func:`get_cached_meta`
+    :param dependencies: keys of the objects included in the object schema, at any depth
+    """
+    cache = get_cache()
+    timeout = get_config().cache_timeout
+    cache.set(get_cache_key(obj, request), (version, value), timeout)
+    if dependencies:
+        local_key = obj._local_key
+        keys = [get_dependents_key(dependency) for dependency in dependencies]
+        dependents = cache.get_many(keys)
+        cache.set_many(
+            {
+                key: dependents.get(key, frozenset()) | {local_key}
+                for key in keys
+                if local_key not in dependents.get(key, ())
+            },
+            timeout,
+        )
+
+
+class SchemaCache:
+    """
+    In-process, thread safe, LRU cache of :py:class:`~meta.models.ModelMeta` schemas, shared between requests.
+
+    Each schema is stored along with the keys of the objects included in it, to discard it when any of them
+    changes (see :py:meth:`invalidate`).
+
+    As invalidation only happens in the process where the objects are saved, schemas expire after
+    :ref:`META_CACHE_TIMEOUT` to bound the staleness in the other processes.
+
+    Size is set by :ref:`META_SCHEMA_CACHE_SIZE`; cache is disabled if size is ``0``.
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, local_key, context):
+        """
+        Retrieve the object schema
+
+        :param local_key: object key as returned by :py:attr:`~meta.models.ModelMeta._local_key`
+        :param context: context as returned by :py:func:`get_cache_context`
+        :return: schema or ``None`` if missing
+        """
+        return self.get_entry(local_key, context)[0]
+
+    def get_entry(self, local_key, context):
+        """
+        Retrieve the object schema and the keys of the objects included in it
+
+        :param local_key: object key as returned by :py:attr:`~meta.models.ModelMeta._local_key`
+        :param context: context as returned by :py:func:`get_cache_context`
+        :return: tuple of schema (``None`` if missing) and set of objects keys
+        """
+        key = (local_key, context)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None, frozenset()
+            schema, dependencies, expires = entry
+            if expires is not None and expires <= monotonic():
+                del self._data[key]
+                return None, frozenset()
+            self._data.move_to_end(key)
+            return schema, dependencies
+
+    def set(self, local_key, context, schema, dependencies=()):
+        """
+        Store the object schema, discarding the least recently used ones if the cache is full
+
+        :param local_key: object key as returned by :py:attr:`~meta.models.ModelMeta._local_key`
+        :param context: context as returned by :py:func:`get_cache_context`
+        :param schema: schema
+        :param dependencies: keys of the objects included in the schema, at any depth
+        """
+        config = get_config()
+        size = config.schema_cache_size
+        if not size:
+            return
+        expires = None if config.cache_timeout is None else monotonic() + config.cache_timeout
+        with self._lock:
+            self._data[(local_key, context)] = (schema, frozenset(dependencies), expires)
+            self._data.move_to_end((local_key, context))
+            while len(self._data) > size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, local_keys):
+        """
+        Discard the schemas of the given objects, and the schemas including them
+
+        :param local_keys: objects keys
+        """
+        local_keys = set(local_keys)
+        with self._lock:
+            for key in [
+                key
+                for key, (__, dependencies, __) in self._data.items()
+                if key[0] in local_keys or not local_keys.isdisjoint(dependencies)
+            ]:
+                del self._data[key]
+
+    def clear(self):
+        """
+        Discard all the schemas
+        """
+        with self._lock:
+            self._data.clear()
+
+
+schema_cache = SchemaCache()
+#: schemas serialized to JSON, spliced as they are in the JSON-LD of the objects including them
+fragment_cache = SchemaCache()
+
+
+def get_invalidation_keys(instance):
+    """
+    Retrieve the keys of the objects whose metadata must be invalidated when the instance changes.
+
+    :py:class:`~meta.models.ModelMeta` objects referenced by foreign keys are included, as they may include
+    the object in their schema (e.g.: a post including its comments).
+
+    :param instance: :py:class:`~meta.models.ModelMeta` instance
+    :return: set of objects keys
+    """
+    from .models import ModelMeta
+
+    keys = {instance._local_key}
+    for field in instance._meta.concrete_fields:
+        model = field.related_model
+        if (
+            (field.many_to_one or field.one_to_one)
+            and field.target_field.primary_key
+            and isinstance(model, type)
+            and issubclass(model, ModelMeta)
+        ):
+            value = getattr(instance, field.attname)
+            if value is not None:
+                keys.add("{}:{}:{}".format(model._meta.app_label, model._meta.model_name, value))
+    return keys
+
+
+def invalidate_keys(local_keys):
+    """
+    Invalidate cached metadata and schemas of the given objects, and of the objects including them
+
+    :param local_keys: objects keys
+    """
+    if get_config().use_cache:
+        cache = get_cache()
+        dependents_keys = [get_dependents_key(local_key) for local_key in local_keys]
+        # dependents are recorded for the objects included at any depth: no need to follow them recursively
+        keys = set(local_keys).union(*cache.get_many(dependents_keys).values())
+        cache.delete_many([get_version_key(local_key) for local_key in keys] + dependents_keys)
+    if get_config().schema_cache_size:
+        schema_cache.invalidate(local_keys)
+        fragment_cache.invalidate(local_keys)
+
+
+def invalidate_meta_cache(instance):
+    """
+    Invalidate all the cached metadata of the object, see :py:func:`get_invalidation_keys`
+
+    :param instance: :py:class:`~meta.models.ModelMeta` instance
+    """
+    invalidate_keys(get_invalidation_keys(instance))
+
+
+def is_cache_enabled():
+    """
+    Check if metadata or schemas are cached, see :ref:`META_USE_CACHE` and :ref:`META_SCHEMA_CACHE_SIZE`
+
+    :return: bool
+    """
+    config = get_config()
+    return bool(config.use_cache or config.schema_cache_size)
+
+
+def invalidate_on_save(sender, instance, **kwargs):
+    """
+    ``post_save`` / ``post_delete`` signal handler
+    """
+    if not is_cache_enabled():
+        return
+    invalidate_meta_cache(instance)
+
+
+def invalidate_on_m2m_changed(sender, instance, action, model, pk_set, **kwargs):
+    """
+    ``m2m_changed`` signal handler
+    """
+    from .models import ModelMeta
+
+    if not action.startswith("post_") or not is_cache_enabled():
+        return
+    keys = set()
+    if isinstance(instance, ModelMeta):
+        keys.update(get_invalidation_keys(instance))
+    if pk_set and issubclass(model, ModelMeta):
+        keys.update("{}:{}:{}".format(model._meta.app_label, model._meta.model_name, pk) for pk in pk_set)
+    invalidate_keys(keys)
+
+
+@receiver(setting_changed)
+def reset_schema_cache(setting, **kwargs):
+    """
+    Discard cached schemas when settings change
+    """
+    if setting.startswith("META_"):
+        schema_cache.clear()
+        fragment_cache.clear()
@@ -0,0 +1,136 @@
+from collections import deque
+from functools import partial
+
+from .schema import OMITTED, SchemaBuilder
+from .utils import SchemaMemo, set_request
+from .views import BaseMeta, encode_json_ld
+
+
+class GraphSchemaBuilder(SchemaBuilder):
+    """
+    :py:class:`~meta.schema.SchemaBuilder` building the nodes of a :py:class:`JsonLdGraph`: nested
+    :py:class:`~meta.models.ModelMeta` objects are replaced by references to their node.
+    """
+
+    __slots__ = ("graph",)
+
+    def __init__(self, graph):
+        """
+        :param graph: :py:class:`JsonLdGraph` instance
+        """
+        # nodes include references instead of full schemas: they are neither stored in the memo nor in the cache
+        super().__init__(SchemaMemo(), request=graph.request)
+        self.graph = graph
+
+    def get_handler(self, cls, asynchronous=False):
+        from meta.models import ModelMeta
+
+        if issubclass(cls, ModelMeta):
+            return _reference_object
+        if issubclass(cls, BaseMeta):
+            return _convert_meta
+        return super().get_handler(cls, asynchronous)
+
+
+def _reference_object(builder, item, depth):
+    return builder.graph._reference(item, depth + 1)
+
+
+def _convert_meta(builder, item, depth):
+    from meta.models import ModelMeta
+
+    if isinstance(item._obj, ModelMeta):
+        return builder.graph._reference(item._obj, depth + 1)
+    if not builder.can_enter(depth + 1):
+        return builder.omit()
+    return builder.enter(item._schema, None, partial(getattr, item, "schemaorg_type"), depth + 1)
+
+
+class JsonLdGraph:
+    """
+    JSON-LD ``@graph`` built from the schema of one or more :py:class:`~meta.views.Meta` objects.
+
+    Each :py:class:`~meta.models.ModelMeta` object is included once in the graph, identified by its
+    :py:meth:`~meta.models.ModelMeta.get_json_ld_id`, and it's referenced by ``@id`` everywhere else.
+
+    Nodes are built with the limits of :py:class:`~meta.schema.SchemaBuilder`: the depth of a node is its
+    distance from the objects added to the graph, and each node is counted as an entity. Objects exceeding
+    the limits are removed from lists, and replaced by ``None`` elsewhere.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        self.nodes = []
+        self._ids = set()
+        self._pending = deque()
+        self._builder = GraphSchemaBuilder(self)
+
+    def add(self, meta):
+        """
+        Add the schema of a :py:class:`~meta.views.Meta` object to the graph
+
+        :param meta: Meta object
+        """
+        from meta.models import ModelMeta
+
+        obj = meta._obj
+        if isinstance(obj, ModelMeta):
+            node_id = self._get_id(obj)
+            # object is already included (e.g.: as related object of another one)
+            if node_id in self._ids:
+                return
+            self._ids.add(node_id)
+        else:
+            node_id = None
+        self._add_node(node_id, meta._schema, partial(getattr, meta, "schemaorg_type"), 0)
+
+    def _add_node(self, node_id, schema, get_type, depth):
+        node = self._builder.build(schema, None, get_type, depth)
+        if node_id:
+            node = {"@id": node_id, **node}
+        self.nodes.append(node)
+
+    def _get_id(self, obj):
+        with set_request(self.request):
+            return obj.get_json_ld_id()
+
+    def _reference(self, obj, depth):
+        """
+        Reference an object node, adding it to the graph if it's not included yet
+
+        :param obj: ModelMeta instance
+        :param depth: depth of the object node
+        :return: reference, :py:data:`~meta.schema.OMITTED` if the object exceeds the limits
+        """
+        node_id = self._get_id(obj)
+        if node_id not in self._ids:
+            builder = self._builder
+            # nodes waiting to be built are counted as well
+            if (builder.max_depth is not None and depth > builder.max_depth) or (
+                builder.max_entities is not None and builder.entities + len(self._pending) >= builder.max_entities
+            ):
+                return OMITTED
+            self._ids.add(node_id)
+            self._pending.append((node_id, obj, depth))
+        return {"@id": node_id}
+
+    def as_dict(self):
+        """
+        Build the graph, including all the referenced objects
+
+        :return: dict
+        """
+        while self._pending:
+            node_id, obj, depth = self._pending.popleft()
+            with set_request(self.request):
+                schema = obj.schema
+            self._add_node(node_id, schema, partial(obj._get_schemaorg_type, self.request), depth)
+        return {"@context": "http://schema.org", "@graph": self.nodes}
+
+    def as_json_ld(self):
+        """
+        Serialize the graph to json-ld using :ref:`META_JSON_LD_ENCODER`
+
+        :return: json
+        """
+        return encode_json_ld(self.as_dict())
@@ -1,18 +1,598 @@
+import asyncio
+import inspect
+import logging
+import time
 import warnings
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from copy import copy
+from functools import partial
 
-from django.db.models import Manager
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.exceptions import FieldDoesNotExist
+from django.core.signals import setting_changed
+from django.db import close_old_connections
+from django.db.models import Aggregate, Manager, OuterRef, Prefetch, QuerySet, Subquery, prefetch_related_objects
+from django.db.models.fields.related_descriptors import ReverseManyToOneDescriptor
+from django.dispatch import receiver
 from django.utils.functional import cached_property
 
-from .settings import get_setting
-from .utils import get_request, set_request
-from .views import FullUrlMixin
+from .cache import get_cached_meta, get_cached_meta_many, schema_cache, set_cached_meta
+from .schema import register_schema_handler
+from .settings import get_config, get_setting
+from .utils import get_executor, get_request, get_url_builder, schema_scope, set_request
+from .views import OUTPUT_FLAGS, FullUrlMixin, Meta, get_pruned_fields
+
+logger = logging.getLogger(__name__)
 
 NEED_REQUEST_OBJECT_ERR_MSG = (
     "Meta models needs request objects when initializing if sites framework "
     "is not used. See META_USE_SITES setting."
 ).strip()
 
+# Resolution plans cache: for each ModelMeta subclass and configuration, it contains the list of
+# fields, their configured value and the accessor function to resolve the value on the instance
+# Cache is reset when any META_* setting is changed
+_plans = {}
+_missing = object()
+
+# Settings providing the default value of ModelMeta._metadata_default fields, see ModelMeta._get_metadata_default
+METADATA_DEFAULT_SETTINGS = {
+    "image": "DEFAULT_IMAGE",
+    "object_type": "DEFAULT_TYPE",
+    "og_type": "FB_TYPE",
+    "og_app_id": "FB_APPID",
+    "og_profile_id": "FB_PROFILE_ID",
+    "og_publisher": "FB_PUBLISHER",
+    "og_author_url": "FB_AUTHOR_URL",
+    "fb_pages": "FB_PAGES",
+    "twitter_type": "TWITTER_TYPE",
+    "twitter_site": "TWITTER_SITE",
+    "twitter_author": "TWITTER_AUTHOR",
+    "schemaorg_type": "SCHEMAORG_TYPE",
+    "custom_namespace": "OG_NAMESPACES",
+}
+
+
+class Related:
+    """
+    Multi valued relation used as :py:attr:`ModelMeta._metadata` / :py:attr:`ModelMeta._schema` value, fetching
+    a bounded subset of the related objects.
+
+    Related objects are read from the database in chunks while the schema is built (see :py:class:`RelatedItems`),
+    unless they have been prefetched (e.g.: by :py:meth:`MetaQuerySet.with_meta`).
+    """
+
+    def __init__(self, name, limit=None, ordering=None, only=None, chunk_size=100):
+        """
+        :param name: relation attribute name (e.g.: ``comments``)
+        :param limit: maximum number of objects, ``None`` to include all the objects
+        :param ordering: objects ordering, as ``order_by`` arguments
+        :param only: fields to load, as ``only`` arguments
+        :param chunk_size: number of objects read from the database at once
+        """
+        self.name = name
+        self.limit = limit
+        self.ordering = tuple(ordering or ())
+        self.only = tuple(only or ())
+        self.chunk_size = chunk_size
+
+    def __repr__(self):
+        return "<Related {}>".format(self.name)
+
+    @property
+    def prefetch_attr(self):
+        """
+        Attribute storing the prefetched objects
+        """
+        return "_meta_prefetched_{}".format(self.name)
+
+    def get_queryset(self, queryset, relation=None, project=False):
+        """
+        Apply ordering, fields and limit to the queryset
+
+        :param queryset: related objects queryset
+        :param relation: relation field, if available, to load the field pointing to the parent object
+        :param project: if ``only`` is not set, load only the fields used by the related objects schema
+                        (see :py:meth:`ModelMeta._get_schema_fields`)
+        :return: queryset
+        """
+        # aggregates used in the related objects schema are computed in the same query
+        if relation is not None:
+            queryset = _annotate_queryset(queryset, relation)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        if relation is not None and (self.only or project):
+            queryset = _project_queryset(queryset, relation, self.only)
+        elif self.only:
+            queryset = queryset.only(*self.only)
+        if self.limit is not None:
+            queryset = queryset[: self.limit]
+        return queryset
+
+    def get_prefetch(self, lookup, relation, project=False):
+        """
+        Build the lookup prefetching the related objects
+
+        :param lookup: prefetch lookup
+        :param relation: relation field
+        :param project: load only the fields used by the related objects schema, see :py:meth:`get_queryset`
+        :return: :py:class:`django.db.models.Prefetch` instance
+        """
+        return Prefetch(
+            lookup,
+            queryset=self.get_queryset(relation.related_model._default_manager.all(), relation, project),
+            to_attr=self.prefetch_attr,
+        )
+
+    def _get_prefetched(self, obj):
+        items = obj.__dict__.get(self.prefetch_attr)
+        if items is None and self.name in getattr(obj, "_prefetched_objects_cache", ()):
+            # relation prefetched by other means, ordering can't be applied
+            items = list(getattr(obj, self.name).all())
+        if items is not None and self.limit is not None:
+            items = items[: self.limit]
+        return items
+
+    def resolve(self, obj, relation=None, project=False):
+        """
+        Retrieve the related objects
+
+        :param obj: model instance
+        :param relation: relation field, if available
+        :param project: load only the fields used by the related objects schema, see :py:meth:`get_queryset`
+        :return: list of prefetched objects or :py:class:`RelatedItems`
+        """
+        items = self._get_prefetched(obj)
+        if items is not None:
+            return items
+        manager = getattr(obj, self.name)
+        return RelatedItems(self.get_queryset(manager.all(), relation, project), self.chunk_size)
+
+    async def aresolve(self, obj, relation=None, project=False):
+        """
+        Asynchronous version of :py:meth:`resolve`
+
+        :return: list of objects
+        """
+        items = self._get_prefetched(obj)
+        if items is not None:
+            return items
+        manager = getattr(obj, self.name)
+        return [item async for item in self.get_queryset(manager.all(), relation, project)]
+
+
+class RelatedItems:
+    """
+    Related objects, read from the database in chunks instead of being loaded at once.
+
+    Objects are kept once read: iterating again, or checking the truth value, never runs another query.
+    The schema is built by :py:meth:`stream` instead, which does not keep them.
+
+    Pickled as a list.
+    """
+
+    __slots__ = ("queryset", "chunk_size", "_items", "_iterator")
+
+    def __init__(self, queryset, chunk_size=100):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+        self._items = []
+        self._iterator = None
+
+    def _read(self):
+        """
+        Read the next object from the database
+
+        :return: ``False`` if all the objects have been read
+        """
+        if self._iterator is None:
+            self._iterator = self.queryset.iterator(chunk_size=self.chunk_size)
+        item = next(self._iterator, _missing)
+        if item is _missing:
+            return False
+        self._items.append(item)
+        return True
+
+    def __iter__(self):
+        index = 0
+        while index < len(self._items) or self._read():
+            yield self._items[index]
+            index += 1
+
+    def __bool__(self):
+        return bool(self._items) or self._read()
+
+    def stream(self):
+        """
+        Iterate the objects without keeping them, unless they have already been read
+
+        :return: iterator
+        """
+        if self._iterator is None:
+            return self.queryset.iterator(chunk_size=self.chunk_size)
+        return iter(self)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _project_queryset(queryset, relation, only=()):
+    """
+    Load only the given fields of the objects of a multi valued relation, or the fields used by their schema.
+
+    If the fields used by the schema cannot be detected (see :py:meth:`ModelMeta._get_schema_fields`), the queryset
+    is returned unchanged.
+
+    :param queryset: related objects queryset
+    :param relation: relation field
+    :param only: fields to load
+    :return: queryset
+    """
+    if not only:
+        model = relation.related_model
+        if not (isinstance(model, type) and issubclass(model, ModelMeta)):
+            return queryset
+        only = model._get_schema_fields()
+        if only is None:
+            return queryset
+        only += (model._meta.pk.name,)
+    if relation.one_to_many:
+        # needed to match the objects to the parent one
+        only += (relation.field.attname,)
+    return queryset.only(*only)
+
+
+def _annotate_queryset(queryset, relation):
+    """
+    Add the aggregates used in the schema of the objects of a relation
+    (see :py:meth:`ModelMeta._get_aggregate_annotations`)
+
+    :param queryset: related objects queryset
+    :param relation: relation field
+    :return: queryset
+    """
+    model = relation.related_model
+    if isinstance(model, type) and issubclass(model, ModelMeta):
+        annotations = model._get_aggregate_annotations(("schema",))
+        if annotations:
+            return queryset.annotate(**annotations)
+    return queryset
+
+
+def _process_value(item, field):
+    """
+    Convert an attribute value into the metadata value
+
+    :param item: attribute value
+    :param field: metadata field name
+    :return: data
+    """
+    if isinstance(item, Manager):
+        return list(item.all())
+    elif callable(item):
+        try:
+            return item(field)
+        except TypeError:
+            return item()
+    return item
+
+
+def _accepts_field(method):
+    """
+    Check if the method accepts the field name as argument
+
+    :param method: unbound method
+    :return: boolean, or None if the signature cannot be inspected
+    """
+    try:
+        parameters = list(inspect.signature(method).parameters.values())[1:]
+    except (TypeError, ValueError):
+        return None
+    positional = (
+        inspect.Parameter.POSITIONAL_ONLY,
+        inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        inspect.Parameter.VAR_POSITIONAL,
+    )
+    return any(param.kind in positional for param in parameters)
+
+
+def _compile_literal(value):
+    """
+    Build the function returning a value which is not an attribute name
+
+    :param value: configured value
+    :return: function accepting the instance and the field name and returning the data
+    """
+
+    def literal(obj, field):
+        return value
+
+    return literal
+
+
+def _compile_attribute(value):
+    """
+    Build the function reading an attribute, detected on each instance (see :py:func:`_process_value`)
+
+    :param value: attribute name
+    :return: function accepting the instance and the field name and returning the data
+    """
+
+    def attribute(obj, field):
+        try:
+            return _process_value(getattr(obj, value), field)
+        except (AttributeError, TypeError):
+            return value
+
+    return attribute
+
+
+def _compile_instance_attribute(value):
+    """
+    Build the function reading an attribute not defined on the class, which may be set on the instance
+
+    :param value: attribute name
+    :return: function accepting the instance and the field name and returning the data
+    """
+
+    def instance_attribute(obj, field):
+        item = obj.__dict__.get(value, _missing)
+        if item is _missing:
+            return value
+        try:
+            return _process_value(item, field)
+        except (AttributeError, TypeError):
+            return value
+
+    return instance_attribute
+
+
+def _compile_method(value, with_field):
+    """
+    Build the function calling a model method
+
+    :param value: method name
+    :param with_field: whether the method is called with the field name
+    :return: function accepting the instance and the field name and returning the data
+    """
+
+    def method_with_field(obj, field):
+        try:
+            return getattr(obj, value)(field)
+        except (AttributeError, TypeError):
+            return value
+
+    def method_without_field(obj, field):
+        try:
+            return getattr(obj, value)()
+        except (AttributeError, TypeError):
+            return value
+
+    return method_with_field if with_field else method_without_field
+
+
+def _compile_coroutine(value, with_field):
+    """
+    Build the function calling a model coroutine method, run with ``async_to_sync`` when resolved synchronously
+
+    :param value: method name
+    :param with_field: whether the method is called with the field name
+    :return: function accepting the instance and the field name and returning the data
+    """
+
+    async def acoroutine_with_field(obj, field):
+        try:
+            return await getattr(obj, value)(field)
+        except (AttributeError, TypeError):
+            return value
+
+    async def acoroutine_without_field(obj, field):
+        try:
+            return await getattr(obj, value)()
+        except (AttributeError, TypeError):
+            return value
+
+    aresolve = acoroutine_with_field if with_field else acoroutine_without_field
+
+    def coroutine(obj, field):
+        return async_to_sync(aresolve)(obj, field)
+
+    coroutine.aresolve = aresolve
+    return coroutine
+
+
+def _compile_relation(model, value, project):
+    """
+    Build the function reading the objects of a multi valued relation
+
+    :param model: ModelMeta class
+    :param value: relation name
+    :param project: if ``True``, only the fields used by the schema of the objects are loaded
+                    (see :py:func:`_project_queryset`)
+    :return: function accepting the instance and the field name and returning the data
+    """
+    relation = model._get_relations().get(value) if project else None
+
+    async def arelated_items(obj, field):
+        manager = getattr(obj, value)
+        if value in getattr(obj, "_prefetched_objects_cache", ()):
+            return list(manager.all())
+        return [item async for item in manager.all()]
+
+    def projected_related_items(obj, field):
+        manager = getattr(obj, value)
+        if value in getattr(obj, "_prefetched_objects_cache", ()):
+            return list(manager.all())
+        return list(_project_queryset(_annotate_queryset(manager.all(), relation), relation))
+
+    async def aprojected_related_items(obj, field):
+        manager = getattr(obj, value)
+        if value in getattr(obj, "_prefetched_objects_cache", ()):
+            return list(manager.all())
+        return [item async for item in _project_queryset(_annotate_queryset(manager.all(), relation), relation)]
+
+    if relation is None:
+        attribute = _compile_attribute(value)
+        attribute.aresolve = arelated_items
+        return attribute
+    projected_related_items.aresolve = aprojected_related_items
+    return projected_related_items
+
+
+def _compile_related(model, related, project):
+    """
+    Build the function resolving a :py:class:`Related` value
+
+    :param model: ModelMeta class
+    :param related: Related instance
+    :param project: if ``True``, only the fields used by the schema of the objects are loaded
+                    (see :py:func:`_project_queryset`)
+    :return: function accepting the instance and the field name and returning the data
+    """
+    try:
+        relation = model._get_relations().get(related.name)
+    except AttributeError:
+        relation = None
+    accessor = partial(_resolve_related, related, relation, project)
+    accessor.aresolve = partial(_aresolve_related, related, relation, project)
+    return accessor
+
+
+def _compile_accessor(model, value, project=False):
+    """
+    Build the function resolving a :py:attr:`ModelMeta._metadata` / :py:attr:`ModelMeta._schema` value.
+
+    The lookup rules documented in :py:attr:`ModelMeta._metadata` are applied once, by inspecting the class, instead
+    of checking them on each instance for every render.
+
+    If the value can be resolved asynchronously (coroutine methods and multi valued relations), the asynchronous
+    version of the function is available as ``aresolve`` attribute.
+
+    :param model: ModelMeta class
+    :param value: configured value
+    :param project: if ``True``, only the fields used by the schema of the objects of multi valued relations are
+                    loaded (see :py:func:`_project_queryset`)
+    :return: function accepting the instance and the field name and returning the data
+    """
+    if isinstance(value, Related):
+        return _compile_related(model, value, project)
+    if not isinstance(value, str) or not value.isidentifier():
+        return _compile_literal(value)
+    if hasattr(model, "__getattr__"):
+        # dynamic attributes cannot be detected in advance
+        return _compile_attribute(value)
+    try:
+        class_attr = inspect.getattr_static(model, value)
+    except AttributeError:
+        return _compile_instance_attribute(value)
+    if inspect.iscoroutinefunction(class_attr):
+        return _compile_coroutine(value, _accepts_field(class_attr))
+    if inspect.isfunction(class_attr):
+        accepts_field = _accepts_field(class_attr)
+        if accepts_field is not None:
+            return _compile_method(value, accepts_field)
+    if isinstance(class_attr, ReverseManyToOneDescriptor):
+        return _compile_relation(model, value, project)
+    return _compile_attribute(value)
+
+
+def _compile_aggregate(aggregate, alias):
+    """
+    Build the function resolving an aggregate used as :py:attr:`ModelMeta._metadata` / :py:attr:`ModelMeta._schema`
+    value (e.g.: ``Count("comments")``).
+
+    The value is read from the ``alias`` annotation if the object has been loaded with it (see
+    :py:meth:`ModelMeta._get_aggregates`), otherwise the aggregate is computed for the object with a query.
+
+    :param aggregate: aggregate expression
+    :param alias: name of the annotation
+    :return: function accepting the instance and the field name and returning the data
+    """
+
+    def aggregated(obj, field):
+        value = obj.__dict__.get(alias, _missing)
+        if value is _missing:
+            queryset = type(obj)._base_manager.db_manager(obj._state.db).filter(pk=obj.pk)
+            value = obj.__dict__[alias] = queryset.aggregate(**{alias: aggregate})[alias]
+        return value
+
+    async def aaggregated(obj, field):
+        value = obj.__dict__.get(alias, _missing)
+        if value is _missing:
+            queryset = type(obj)._base_manager.db_manager(obj._state.db).filter(pk=obj.pk)
+            value = obj.__dict__[alias] = (await queryset.aaggregate(**{alias: aggregate}))[alias]
+        return value
+
+    aggregated.aresolve = aaggregated
+    aggregated.alias = alias
+    aggregated.aggregate = aggregate
+    return aggregated
+
+
+def _resolve_related(related, relation, project, obj, field):
+    return related.resolve(obj, relation, project)
+
+
+async def _aresolve_related(related, relation, project, obj, field):
+    return await related.aresolve(obj, relation, project)
+
+
+def _resolve_slow(request, accessor, obj, field):
+    """
+    Resolve a :py:attr:`ModelMeta._metadata_slow` field in a worker thread of the shared pool.
+
+    The thread database connections are closed as at the end of a request, as they are never closed otherwise.
+
+    :param request: optional request object
+    :param accessor: field accessor from the resolution plan
+    :param obj: ModelMeta instance
+    :param field: metadata field name
+    :return: resolved value
+    """
+    close_old_connections()
+    try:
+        with set_request(request):
+            return accessor(obj, field)
+    finally:
+        close_old_connections()
+
+
+def _lazy_fallback(meta, field, general, resolve):
+    """
+    Resolve a :py:class:`~meta.views.LazyMeta` field falling back to a general one (e.g.: ``og_title`` to ``title``)
+
+    :param meta: LazyMeta object
+    :param field: field name
+    :param general: name of the fallback field
+    :param resolve: callable resolving the field, ``None`` if the field is not configured
+    :return: resolved value
+    """
+    value = resolve() if resolve else getattr(meta, field, None)
+    return value or getattr(meta, general, False) or value
+
+
+def _build_plan(model, config, project=False):
+    """
+    Build the resolution plan for the given configuration
+
+    Fields with a false value are skipped as they are never rendered.
+
+    :param model: ModelMeta class
+    :param config: metadata / schema configuration dictionary
+    :param project: load only the fields used by the schema of related objects, see :py:func:`_compile_accessor`
+    :return: tuple of (field, value, accessor) tuples
+    """
+    plan = []
+    for field, value in config.items():
+        if not value:
+            continue
+        if isinstance(value, Aggregate):
+            accessor = _compile_aggregate(value, "meta_{}_{}".format("schema" if project else "metadata", field))
+        else:
+            accessor = _compile_accessor(model, value, project)
+        plan.append((field, value, accessor))
+    return tuple(plan)
+
 
 class ModelMeta(FullUrlMixin):
     """
@@ -46,29 +626,43 @@ class ModelMeta(FullUrlMixin):
         "twitter_description": False,
         "schemaorg_description": False,
         "keywords": False,
-        "image": get_setting("DEFAULT_IMAGE"),
+        "image": get_config().default_image,
         "image_object": None,
         "image_width": False,
         "image_height": False,
-        "object_type": get_setting("DEFAULT_TYPE"),
-        "og_type": get_setting("FB_TYPE"),
-        "og_app_id": get_setting("FB_APPID"),
-        "og_profile_id": get_setting("FB_PROFILE_ID"),
-        "og_publisher": get_setting("FB_PUBLISHER"),
-        "og_author_url": get_setting("FB_AUTHOR_URL"),
-        "fb_pages": get_setting("FB_PAGES"),
-        "twitter_type": get_setting("TWITTER_TYPE"),
-        "twitter_site": get_setting("TWITTER_SITE"),
-        "twitter_author": get_setting("TWITTER_AUTHOR"),
-        "schemaorg_type": get_setting("SCHEMAORG_TYPE"),
+        "object_type": get_config().default_type,
+        "og_type": get_config().fb_type,
+        "og_app_id": get_config().fb_appid,
+        "og_profile_id": get_config().fb_profile_id,
+        "og_publisher": get_config().fb_publisher,
+        "og_author_url": get_config().fb_author_url,
+        "fb_pages": get_config().fb_pages,
+        "twitter_type": get_config().twitter_type,
+        "twitter_site": get_config().twitter_site,
+        "twitter_author": get_config().twitter_author,
+        "schemaorg_type": get_config().schemaorg_type,
         "published_time": False,
         "modified_time": False,
         "expiration_time": False,
         "tag": False,
         "url": False,
         "locale": False,
-        "custom_namespace": get_setting("OG_NAMESPACES"),
+        "custom_namespace": get_config().og_namespaces,
     }
+    _meta_class = Meta
+    """
+    Class of the objects built by :py:meth:`as_meta` (e.g.: :py:class:`~meta.views.CompactMeta` to reduce
+    memory usage). Ignored in lazy mode.
+    """
+    _metadata_slow = {}
+    """
+    Metadata fields whose providers are slow (e.g.: they perform network or storage I/O).
+
+    Dictionary of field name / timeout in seconds (``None`` to use :ref:`META_EXECUTOR_TIMEOUT`).
+
+    Providers of these fields are run in parallel in a shared thread pool; if a provider does not complete
+    within the timeout, the field value in :py:attr:`_metadata_default` is used instead.
+    """
     _schema = {}
     """
     schema.org properties dictionary
@@ -92,23 +686,525 @@ class ModelMeta(FullUrlMixin):
     See :ref:`a sample implementation <schema.model>`.
     """
 
+    _metadata_fields = None
+    """
+    Model fields read by the methods and properties used in :py:attr:`_metadata`.
+
+    Fields used in :py:attr:`_metadata` by name are detected automatically: if the object has been loaded
+    without some of these fields (e.g.: by :py:meth:`~django.db.models.query.QuerySet.only`), they are loaded
+    in a single query before resolving the metadata (see :py:meth:`_load_deferred_fields`).
+    """
+    _schema_fields = None
+    """
+    Model fields read by the methods and properties used in :py:attr:`_schema`.
+
+    Fields used in :py:attr:`_schema` by name are detected automatically, but fields read by methods are not:
+    if methods are used, this must be set to load only the needed fields when the objects are included in other
+    objects schema (see :py:meth:`_get_schema_fields`).
+    """
+
     def get_meta(self, request=None):
         """
         Retrieve the meta data configuration
         """
-        metadata = copy(self._metadata_default)
+        metadata = self._get_metadata_default()
         metadata.update(self._metadata)
         return metadata
 
-    def _retrieve_data(self, request, metadata):
+    @classmethod
+    def _get_metadata_default(cls):
+        """
+        Retrieve :py:attr:`_metadata_default`, reading the values provided by the settings (see
+        ``METADATA_DEFAULT_SETTINGS``) from the current settings.
+
+        Values which differ from the ones of :py:class:`ModelMeta` (i.e.: customized by the class) are kept, so that
+        classes copying the defaults of :py:class:`ModelMeta` follow the settings as well.
+
+        :return: dictionary
         """
-        Build the data according to the metadata configuration
+        metadata = copy(cls._metadata_default)
+        base = ModelMeta._metadata_default
+        for field, name in METADATA_DEFAULT_SETTINGS.items():
+            if field in metadata and metadata[field] == base[field]:
+                metadata[field] = get_setting(name)
+        return metadata
+
+    @classmethod
+    def _get_plan(cls, name):
+        """
+        Retrieve the resolution plan for the class configuration.
+
+        The plan is built on first use and cached per class, it's reset when any ``META_*`` setting changes.
+
+        :param name: ``metadata`` (:py:attr:`_metadata_default` merged with :py:attr:`_metadata`) or
+                     ``schema`` (:py:attr:`_schema`)
+        :return: tuple of (field, value, accessor) tuples
+        """
+        plan = _plans.get((cls, name))
+        if plan is None:
+            if name == "metadata":
+                config = cls._get_metadata_default()
+                config.update(cls._metadata)
+                plan = _build_plan(cls, config)
+            else:
+                # related objects are only included in the schema: their other fields are not needed
+                plan = _build_plan(cls, cls._schema, project=True)
+            _plans[(cls, name)] = plan
+        return plan
+
+    @classmethod
+    def _get_relations(cls):
+        """
+        Retrieve the model relations by the name of the attribute used to access them
+
+        :return: dictionary of attribute name / relation field
+        """
+        relations = {}
+        for field in cls._meta.get_fields():
+            if not field.is_relation:
+                continue
+            if field.auto_created and not field.concrete:
+                relations[field.get_accessor_name()] = field
+            else:
+                relations[field.name] = field
+        return relations
+
+    @classmethod
+    def _get_relation_names(cls, plans=("metadata", "schema")):
+        """
+        Retrieve the relations used in :py:attr:`_metadata` and :py:attr:`_schema`
+
+        :param plans: configurations to inspect, see :py:meth:`_get_plan`
+        :return: list of attribute names
+        """
+        relations = cls._get_relations()
+        names = []
+        for name in plans:
+            for __, value, __ in cls._get_plan(name):
+                if isinstance(value, Related):
+                    value = value.name
+                if isinstance(value, str) and value in relations and value not in names:
+                    names.append(value)
+        return names
+
+    @classmethod
+    def _get_schema_fields(cls):
+        """
+        Retrieve the model fields read to build the schema.
+
+        They are the fields used by name in :py:attr:`_schema`, the fields in :py:attr:`_schema_fields`, and the
+        foreign keys used to fetch the related objects (see :py:meth:`_get_related_lookups`). They are detected once
+        per class.
+
+        :return: tuple of field names, ``None`` if they cannot be detected, i.e.: if methods or properties are used
+                 and :py:attr:`_schema_fields` is not set
+        """
+        fields = _plans.get((cls, "schema_fields"), _missing)
+        if fields is _missing:
+            fields = _plans[(cls, "schema_fields")] = cls._detect_schema_fields()
+        return fields
+
+    @classmethod
+    def _detect_schema_fields(cls):
+        if hasattr(cls, "__getattr__"):
+            # dynamic attributes cannot be detected in advance
+            return None
+        plan = cls._get_plan("schema")
+        if "@type" not in cls._schema:
+            plan += tuple(entry for entry in cls._get_plan("metadata") if entry[0] == "schemaorg_type")
+        relations = cls._get_relations()
+        fields = list(cls._schema_fields or ())
+        for __, value, __ in plan:
+            if not isinstance(value, str) or not value.isidentifier() or value in relations:
+                continue
+            try:
+                fields.append(cls._meta.get_field(value).name)
+            except FieldDoesNotExist:
+                try:
+                    inspect.getattr_static(cls, value)
+                except AttributeError:
+                    # literal value
+                    continue
+                if cls._schema_fields is None:
+                    return None
+        for name in cls._get_relation_names():
+            if relations[name].concrete and not relations[name].many_to_many:
+                fields.append(name)
+        return tuple(dict.fromkeys(fields))
+
+    @classmethod
+    def _get_field_attnames(cls):
+        """
+        Retrieve the attribute name of the concrete model fields, by field name and attribute name
+
+        :return: dictionary of name / attribute name
+        """
+        attnames = _plans.get((cls, "attnames"))
+        if attnames is None:
+            attnames = {}
+            for field in cls._meta.concrete_fields:
+                attnames[field.name] = attnames[field.attname] = field.attname
+            _plans[(cls, "attnames")] = attnames
+        return attnames
+
+    def _get_deferred_fields(self, plan, with_schema):
+        """
+        Retrieve the deferred model fields read to resolve the plan
+
+        :param plan: metadata resolution plan
+        :param with_schema: whether the schema is resolved as well
+        :return: set of attribute names
+        """
+        try:
+            deferred = self.get_deferred_fields()
+        except AttributeError:
+            return set()
+        if not deferred:
+            return deferred
+        attnames = self._get_field_attnames()
+        names = list(self._metadata_fields or ())
+        names.extend(value for __, value, __ in plan)
+        if with_schema:
+            names.extend(self._schema_fields or ())
+            names.extend(value for __, value, __ in self._get_plan("schema"))
+        needed = {attnames[name] for name in names if isinstance(name, str) and name in attnames}
+        return deferred & needed
+
+    def _load_deferred_fields(self, plan, with_schema):
+        """
+        Load the deferred model fields read to resolve the plan in a single query, instead of one query per field
+
+        :param plan: metadata resolution plan
+        :param with_schema: whether the schema is resolved as well
+        """
+        fields = self._get_deferred_fields(plan, with_schema)
+        if fields:
+            logger.warning(
+                "Deferred fields %s of %s are needed to build the metadata: loading them with an extra query",
+                ", ".join(sorted(fields)),
+                self._local_key,
+            )
+            self.refresh_from_db(fields=fields)
+
+    @classmethod
+    def _load_deferred_fields_many(cls, objs, request=None):
+        """
+        Load the deferred model fields read to resolve the metadata of the objects, with one query per database
+
+        :param objs: list of model instances
+        :param request: optional request object
+        """
+        pending = {}
+        for obj in objs:
+            fields = obj._get_deferred_fields(*obj._get_output_plan(request))
+            if fields:
+                pending.setdefault(obj._state.db, []).append((obj, fields))
+        for using, items in pending.items():
+            fields = sorted(set().union(*(fields for __, fields in items)))
+            logger.warning(
+                "Deferred fields %s of %d %s objects are needed to build the metadata: loading them with an extra "
+                "query",
+                ", ".join(fields),
+                len(items),
+                cls._meta.label,
+            )
+            values = {
+                row[0]: row[1:]
+                for row in cls._base_manager.db_manager(using)
+                .filter(pk__in=[obj.pk for obj, __ in items])
+                .values_list("pk", *fields)
+            }
+            for obj, obj_fields in items:
+                row = values.get(obj.pk)
+                if row is None:
+                    continue
+                for field, value in zip(fields, row):
+                    if field in obj_fields:
+                        setattr(obj, field, value)
+
+    @classmethod
+    def _get_related_declarations(cls):
+        """
+        Retrieve the :py:class:`Related` declarations used in :py:attr:`_metadata` and :py:attr:`_schema`
+
+        :return: dictionary of attribute name / Related instance
+        """
+        declarations = {}
+        for name in ("metadata", "schema"):
+            for __, value, __ in cls._get_plan(name):
+                if isinstance(value, Related):
+                    declarations.setdefault(value.name, value)
+        return declarations
+
+    @classmethod
+    def _get_aggregates(cls, plans=("metadata", "schema")):
+        """
+        Retrieve the aggregates used in :py:attr:`_metadata` and :py:attr:`_schema`
+
+        :param plans: configurations to inspect, see :py:meth:`_get_plan`
+        :return: dictionary of annotation name / aggregate, suitable for :py:meth:`~django.db.models.QuerySet.annotate`
+        """
+        aggregates = {}
+        for name in plans:
+            for __, value, accessor in cls._get_plan(name):
+                if isinstance(value, Aggregate):
+                    aggregates[accessor.alias] = accessor.aggregate
+        return aggregates
+
+    @classmethod
+    def _get_aggregate_annotations(cls, plans=("metadata", "schema")):
+        """
+        Retrieve the annotations computing the aggregates used in :py:attr:`_metadata` and :py:attr:`_schema`.
+
+        Each aggregate is computed by a correlated subquery: aggregates over different multi valued relations
+        in the same ``annotate()`` would be computed on the joined rows, multiplying each other.
+
+        :param plans: configurations to inspect, see :py:meth:`_get_plan`
+        :return: dictionary of annotation name / subquery, suitable for :py:meth:`~django.db.models.QuerySet.annotate`
+        """
+        return {
+            alias: Subquery(
+                cls._base_manager.filter(pk=OuterRef("pk")).values("pk").annotate(**{alias: aggregate}).values(alias)
+            )
+            for alias, aggregate in cls._get_aggregates(plans).items()
+        }
+
+    @classmethod
+    def _load_aggregates_many(cls, objs):
+        """
+        Compute the aggregates used in :py:attr:`_metadata` and :py:attr:`_schema` for the objects not annotated with
+        them, with one query per database
+
+        :param objs: list of model instances
+        """
+        annotations = cls._get_aggregate_annotations()
+        pending = {}
+        for obj in objs:
+            if any(alias not in obj.__dict__ for alias in annotations):
+                pending.setdefault(obj._state.db, []).append(obj)
+        for using, items in pending.items():
+            values = {
+                row["pk"]: row
+                for row in cls._base_manager.db_manager(using)
+                .filter(pk__in=[obj.pk for obj in items])
+                .values("pk")
+                .annotate(**annotations)
+            }
+            for obj in items:
+                row = values.get(obj.pk)
+                if row is None:
+                    continue
+                for alias in annotations:
+                    obj.__dict__.setdefault(alias, row[alias])
+
+    @classmethod
+    def _get_related_lookups(cls, max_depth=2):
+        """
+        Retrieve the lookups needed to fetch the relations used in :py:attr:`_metadata` and :py:attr:`_schema`.
+
+        Relations of the related models are included as well if they are :py:class:`ModelMeta` subclasses,
+        up to ``max_depth`` levels.
+
+        :param max_depth: number of relations levels to follow
+        :return: tuple of lists of ``select_related`` and ``prefetch_related`` lookups
+        """
+        select_related = []
+        prefetch_related = []
+        cls._collect_related_lookups(select_related, prefetch_related, "", True, max_depth)
+        return select_related, prefetch_related
+
+    @classmethod
+    def _collect_related_lookups(cls, select_related, prefetch_related, prefix, single, depth):
+        relations = cls._get_relations()
+        declarations = cls._get_related_declarations()
+        # objects of relations only used in the schema are loaded with the fields used by their schema only
+        metadata_names = cls._get_relation_names(("metadata",))
+        for name in cls._get_relation_names():
+            field = relations[name]
+            lookup = "{}{}".format(prefix, name)
+            single_valued = single and not (field.many_to_many or field.one_to_many)
+            multi_valued = field.many_to_many or field.one_to_many
+            if single_valued:
+                select_related.append(lookup)
+            elif name in declarations and multi_valued:
+                related = declarations[name]
+                prefetch_related.append(related.get_prefetch(lookup, field, name not in metadata_names))
+                # nested relations are fetched for the bounded subset of objects only
+                lookup = "{}{}".format(prefix, related.prefetch_attr)
+            elif multi_valued and name not in metadata_names:
+                queryset = field.related_model._default_manager.all()
+                projected = _project_queryset(_annotate_queryset(queryset, field), field)
+                prefetch_related.append(Prefetch(lookup, queryset=projected) if projected is not queryset else lookup)
+            elif multi_valued:
+                queryset = field.related_model._default_manager.all()
+                annotated = _annotate_queryset(queryset, field)
+                prefetch_related.append(Prefetch(lookup, queryset=annotated) if annotated is not queryset else lookup)
+            else:
+                prefetch_related.append(lookup)
+            model = field.related_model
+            if depth > 1 and isinstance(model, type) and issubclass(model, ModelMeta):
+                model._collect_related_lookups(
+                    select_related, prefetch_related, "{}__".format(lookup), single_valued, depth - 1
+                )
+
+    @classmethod
+    def as_meta_many(cls, objs, request=None):
+        """
+        Build the :py:class:`~meta.views.Meta` objects for a list of instances.
+
+        Relations used in :py:attr:`_metadata` and :py:attr:`_schema` are fetched for all the instances at once
+        to avoid running the same queries for each instance.
+
+        If :ref:`META_USE_CACHE` is set, the cached data of all the instances is retrieved at once, and relations,
+        deferred fields and aggregates are loaded only for the instances missing from the cache.
+
+        :param objs: iterable of model instances (e.g.: a queryset)
+        :param request: optional request object. Used to build the correct URI for linked objects
+        :return: list of Meta objects
+        """
+        objs = list(objs)
+        use_cache = get_config().use_cache
+        missing = objs
+        if use_cache:
+            entries = get_cached_meta_many(objs, request) if objs else []
+            missing = [obj for obj, (cached, __) in zip(objs, entries) if not cached]
+        select_related, prefetch_related = cls._get_related_lookups()
+        lookups = select_related + prefetch_related
+        if missing and lookups:
+            prefetch_related_objects(missing, *lookups)
+        cls._load_deferred_fields_many(missing, request)
+        cls._load_aggregates_many(missing)
+        if not use_cache:
+            return [obj.as_meta(request) for obj in objs]
+        return [obj._build_cached_meta(request, *entry) for obj, entry in zip(objs, entries)]
+
+    def _get_metadata_plan(self, request=None):
+        """
+        Retrieve the resolution plan for the metadata.
+
+        If :py:meth:`get_meta` is customized, the plan is built from its return value on each call.
+        """
+        if type(self).get_meta is not ModelMeta.get_meta:
+            return _build_plan(type(self), self.get_meta(request))
+        return self._get_plan("metadata")
+
+    def _get_output_plan(self, request=None):
+        """
+        Retrieve the resolution plan for the metadata used by the enabled outputs.
+
+        If :ref:`META_PRUNE_FIELDS` is set, fields not used by any enabled output are removed from the plan
+        (see :py:data:`meta.views.FIELD_OUTPUTS`); pruned plans are cached per class and set of outputs.
+
+        :param request: optional request object
+        :return: tuple of resolution plan and whether the schema is needed
+        """
+        plan = self._get_metadata_plan(request)
+        if not get_config().prune_fields:
+            return plan, bool(self._schema)
+        outputs = self._get_outputs(plan)
+        pruned = get_pruned_fields(outputs)
+        with_schema = bool(self._schema) and "schema" not in pruned
+        if plan is not self._get_plan("metadata"):
+            # plan built from a customized get_meta, not cached
+            return tuple(entry for entry in plan if entry[0] not in pruned), with_schema
+        key = (type(self), ("metadata", outputs))
+        if key not in _plans:
+            _plans[key] = tuple(entry for entry in plan if entry[0] not in pruned)
+        return _plans[key], with_schema
+
+    def _get_outputs(self, plan):
+        """
+        Outputs enabled for the object, as the set of ``use_*`` flags (see :py:data:`meta.views.OUTPUT_FLAGS`)
+        set to ``True``.
+
+        Flags are evaluated from the plan, falling back to the settings.
+
+        :param plan: resolution plan
+        :return: frozenset
+        """
+        config = get_config()
+        flags = {field: accessor for field, __, accessor in plan if field in OUTPUT_FLAGS}
+        outputs = set()
+        for flag, setting in OUTPUT_FLAGS.items():
+            accessor = flags.get(flag)
+            if accessor is None:
+                enabled = getattr(config, setting)
+            else:
+                # asynchronous providers can't be evaluated here: output is assumed to be enabled
+                enabled = hasattr(accessor, "aresolve") or accessor(self, flag)
+            if enabled:
+                outputs.add(flag)
+        return frozenset(outputs)
+
+    def _retrieve_data(self, request, plan):
+        """
+        Build the data according to the metadata resolution plan
         """
         with set_request(request):
-            for field, value in metadata.items():
-                if value:
-                    data = self._get_meta_value(field, value)
-                    yield field, data
+            if not self._metadata_slow:
+                for field, __, accessor in plan:
+                    yield field, accessor(self, field)
+                return
+            yield from self._retrieve_data_with_executor(request, plan)
+
+    def _retrieve_data_with_executor(self, request, plan):
+        """
+        Build the data according to the metadata resolution plan, running :py:attr:`_metadata_slow` providers
+        in the shared thread pool.
+        """
+        executor = get_executor()
+        started = time.monotonic()
+        futures = {
+            field: executor.submit(_resolve_slow, request, accessor, self, field)
+            for field, __, accessor in plan
+            if field in self._metadata_slow
+        }
+        data = {field: accessor(self, field) for field, __, accessor in plan if field not in futures}
+        for field, future in futures.items():
+            value = self._get_slow_result(field, future, started)
+            if value is not _missing:
+                data[field] = value
+        for field, __, __ in plan:
+            if field in data:
+                yield field, data[field]
+
+    def _get_slow_result(self, field, future, started):
+        """
+        Wait for the result of a :py:attr:`_metadata_slow` provider, falling back to :py:attr:`_metadata_default`
+        if it does not complete within the field timeout.
+
+        :param field: metadata field name
+        :param future: future running the provider
+        :param started: time (as in :py:func:`time.monotonic`) the provider has been submitted at
+        :return: resolved value, ``_missing`` if timed out and no default is available
+        """
+        timeout = self._metadata_slow[field]
+        if timeout is None:
+            timeout = get_config().executor_timeout
+        try:
+            return future.result(max(timeout - (time.monotonic() - started), 0))
+        except FutureTimeoutError:
+            default = self._get_metadata_default().get(field)
+            if default:
+                return _compile_accessor(type(self), default)(self, field)
+        return _missing
+
+    def _resolve_lazy(self, request, field, accessor):
+        """
+        Resolve a single field of a :py:class:`~meta.views.LazyMeta` object.
+
+        :param request: optional request object
+        :param field: metadata field name
+        :param accessor: field accessor from the resolution plan
+        :return: resolved value
+        """
+        if field not in self._metadata_slow:
+            with set_request(request):
+                return accessor(self, field)
+        value = self._get_slow_result(
+            field, get_executor().submit(_resolve_slow, request, accessor, self, field), time.monotonic()
+        )
+        return None if value is _missing else value
 
     def _get_meta_value(self, field, value):
         """
@@ -118,36 +1214,80 @@ class ModelMeta(FullUrlMixin):
         :param value: provided value
         :return: data
         """
-
-        def process_value(item):
-            if isinstance(item, Manager):
-                return list(item.all())
-            elif callable(item):
-                try:
-                    return item(field)
-                except TypeError:
-                    return item()
-            return item
-
         if value:
-            try:
-                return process_value(getattr(self, value))
-            except (AttributeError, TypeError):
-                return value
+            return _compile_accessor(type(self), value)(self, field)
 
-    def as_meta(self, request=None):
+    def as_meta(self, request=None, lazy=None):
         """
         Populates the :py:class:`~meta.views.Meta` object  with values from :py:attr:`_metadata`
 
+        If :ref:`META_USE_CACHE` is set, resolved metadata and schema are stored in the cache and reused until
+        the object is modified.
+
+        In lazy mode a :py:class:`~meta.views.LazyMeta` object is returned instead, whose fields are resolved
+        on first access; lazy mode is ignored if :ref:`META_USE_CACHE` is set.
+
         :param request: optional request object. Used to build the correct URI for linked objects
+        :param lazy: enable lazy mode (default: :ref:`META_LAZY`)
+        :return: Meta object
+        """
+        config = get_config()
+        use_cache = config.use_cache
+        if lazy is None:
+            lazy = config.lazy
+        if lazy and not use_cache:
+            plan, with_schema = self._get_output_plan(request)
+            self._load_deferred_fields(plan, with_schema)
+            return self._build_lazy_meta(request, plan, with_schema)
+        if use_cache:
+            return self._build_cached_meta(request, *get_cached_meta(self, request))
+        return self._build_meta(request, *self._resolve_meta(request))
+
+    def _resolve_meta(self, request):
+        """
+        Resolve the metadata and the schema used by the enabled outputs
+
+        :param request: optional request object
+        :return: tuple of resolved metadata and schema (``None`` if not used)
+        """
+        plan, with_schema = self._get_output_plan(request)
+        self._load_deferred_fields(plan, with_schema)
+        data = dict(self._retrieve_data(request, plan))
+        return data, self.schema if with_schema else None
+
+    def _build_cached_meta(self, request, cached, version):
+        """
+        Create the :py:class:`~meta.views.Meta` object from the cached data, resolving and storing it if missing
+
+        :param request: optional request object
+        :param cached: cached data as returned by :py:func:`~meta.cache.get_cached_meta`, ``None`` if missing
+        :param version: object data version as returned by :py:func:`~meta.cache.get_cached_meta`
         :return: Meta object
         """
-        from meta.views import Meta
+        if cached:
+            return self._build_meta(request, *cached)
+        data, schema = self._resolve_meta(request)
+        meta = self._build_meta(request, data, schema)
+        dependencies = ()
+        if schema:
+            with schema_scope() as memo:
+                schema = meta.schema
+            dependencies = memo.dependencies.get(self._local_key, ())
+        set_cached_meta(self, request, (data, schema), version, dependencies)
+        return meta
 
-        metadata = self.get_meta(request)
-        meta = Meta(request=request, obj=self)
-        for field, data in self._retrieve_data(request, metadata):
-            setattr(meta, field, data)
+    def _build_meta(self, request, data, schema):
+        """
+        Create the :py:class:`~meta.views.Meta` object from the resolved data
+
+        :param request: optional request object
+        :param data: resolved metadata
+        :param schema: resolved schema
+        :return: Meta object
+        """
+        meta = self._meta_class(request=request, obj=self)
+        for field, value in data.items():
+            setattr(meta, field, value)
         for field in ("og_title", "twitter_title", "schemaorg_title"):
             generaltitle = getattr(meta, "title", False)
             if not getattr(meta, field, False) and generaltitle:
@@ -156,10 +1296,161 @@ class ModelMeta(FullUrlMixin):
             generaldesc = getattr(meta, "description", False)
             if not getattr(meta, field, False) and generaldesc:
                 setattr(meta, field, generaldesc)
-        if self._schema:
-            meta.schema = self.schema
+        if schema:
+            meta.schema = schema
+        return meta
+
+    def _build_lazy_meta(self, request, plan, with_schema):
+        """
+        Create the :py:class:`~meta.views.LazyMeta` object deferring the resolution of the plan
+
+        :param request: optional request object
+        :param plan: resolution plan
+        :param with_schema: whether the schema is resolved
+        :return: LazyMeta object
+        """
+        from meta.views import LazyMeta
+
+        meta = LazyMeta(request=request, obj=self)
+        pending = {field: partial(self._resolve_lazy, request, field, accessor) for field, __, accessor in plan}
+        for general, fields in (
+            ("title", ("og_title", "twitter_title", "schemaorg_title")),
+            ("description", ("og_description", "twitter_description", "schemaorg_description")),
+        ):
+            for field in fields:
+                pending[field] = partial(_lazy_fallback, meta, field, general, pending.get(field))
+        if with_schema:
+            pending["schema"] = partial(self._resolve_lazy, request, "schema", lambda obj, field: obj.schema)
+        meta._pending = pending
+        return meta
+
+    async def _aresolve(self, request, plan):
+        """
+        Resolve the plan asynchronously.
+
+        Asynchronous providers (coroutine methods and multi valued relations) are awaited concurrently,
+        along with the synchronous ones, which are run at once in a worker thread as they may access the database.
+
+        :param request: optional request object
+        :param plan: resolution plan
+        :return: dictionary of resolved data
+        """
+        sync_plan = [entry for entry in plan if not hasattr(entry[2], "aresolve")]
+        async_plan = [(field, accessor.aresolve) for field, __, accessor in plan if hasattr(accessor, "aresolve")]
+
+        def resolve_sync():
+            return dict(self._retrieve_data(request, sync_plan))
+
+        async def aresolve_sync():
+            if sync_plan:
+                return await sync_to_async(resolve_sync)()
+            return {}
+
+        with set_request(request):
+            results = await asyncio.gather(aresolve_sync(), *(accessor(self, field) for field, accessor in async_plan))
+        resolved = results[0]
+        resolved.update(zip((field for field, __ in async_plan), results[1:]))
+        return {field: resolved[field] for field, __, __ in plan if field in resolved}
+
+    async def _aresolve_schema(self, request):
+        """
+        Resolve :py:attr:`schema` asynchronously
+        """
+        if "schema" not in self.__dict__:
+            self.__dict__["schema"] = await self._aresolve(request, self._get_plan("schema"))
+        return self.schema
+
+    async def aas_meta(self, request=None):
+        """
+        Asynchronous version of :py:meth:`as_meta`.
+
+        Coroutine methods can be used as providers in :py:attr:`_metadata` and :py:attr:`_schema`, and multi
+        valued relations are fetched using the asynchronous ORM interface. See :py:meth:`_aresolve`.
+
+        The schema is built as well, to avoid running queries when it's accessed in the template.
+
+        :param request: optional request object. Used to build the correct URI for linked objects
+        :return: Meta object
+        """
+        use_cache = get_config().use_cache
+        cached = None
+        if use_cache:
+            cached, version = await sync_to_async(get_cached_meta)(self, request)
+        if cached:
+            data, schema = cached
+        else:
+            plan, with_schema = self._get_output_plan(request)
+            if self.get_deferred_fields():
+                await sync_to_async(self._load_deferred_fields)(plan, with_schema)
+            resolvers = [self._aresolve(request, plan)]
+            if with_schema:
+                resolvers.append(self._aresolve_schema(request))
+            results = await asyncio.gather(*resolvers)
+            data = results[0]
+            schema = results[1] if with_schema else None
+        meta = await sync_to_async(self._build_meta)(request, data, schema)
+        dependencies = ()
+        if schema:
+            with schema_scope() as memo:
+                schema = await meta.aschema()
+            dependencies = memo.dependencies.get(self._local_key, ())
+        if use_cache and not cached:
+            await sync_to_async(set_cached_meta)(self, request, (data, schema), version, dependencies)
         return meta
 
+    def as_schema(self, request=None):
+        """
+        Build the schema.org representation of the object.
+
+        Unlike :py:meth:`as_meta`, only :py:attr:`_schema` is resolved (and ``schemaorg_type`` from
+        :py:attr:`_metadata` if no ``@type`` is set in :py:attr:`_schema`), thus it's used to build the schema
+        of the objects included in other objects schema.
+
+        :param request: optional request object. Used to build the correct URI for linked objects
+        :return: dict
+        """
+        kwargs = {}
+        if "@type" not in self._schema:
+            kwargs["schemaorg_type"] = self._get_schemaorg_type(request)
+        return Meta(request=request, obj=self, schema=self.schema, **kwargs).schema
+
+    def _get_schemaorg_type(self, request=None):
+        """
+        Resolve ``schemaorg_type`` from :py:attr:`_metadata`, used as schema type if not set in :py:attr:`_schema`
+
+        :param request: optional request object
+        :return: schema.org type
+        """
+        with set_request(request):
+            for field, __, accessor in self._get_metadata_plan(request):
+                if field == "schemaorg_type":
+                    return accessor(self, field)
+        return get_config().schemaorg_type
+
+    async def _aget_schemaorg_type(self, request=None):
+        """
+        Asynchronous version of :py:meth:`_get_schemaorg_type`
+        """
+        if "@type" in self._schema:
+            return None
+        plan = tuple(entry for entry in self._get_metadata_plan(request) if entry[0] == "schemaorg_type")
+        resolved = await self._aresolve(request, plan)
+        return resolved.get("schemaorg_type", get_config().schemaorg_type)
+
+    async def aas_schema(self, request=None):
+        """
+        Asynchronous version of :py:meth:`as_schema`
+
+        :param request: optional request object. Used to build the correct URI for linked objects
+        :return: dict
+        """
+        plan = ()
+        if "@type" not in self._schema:
+            plan = tuple(entry for entry in self._get_metadata_plan(request) if entry[0] == "schemaorg_type")
+        kwargs, schema = await asyncio.gather(self._aresolve(request, plan), self._aresolve_schema(request))
+        meta = await sync_to_async(Meta)(request=request, obj=self, schema=schema, **kwargs)
+        return await meta.aschema()
+
     @cached_property
     def schema(self):
         """
@@ -168,9 +1459,8 @@ class ModelMeta(FullUrlMixin):
         :return: dict
         """
         schema = {}
-        for field, value in self._schema.items():
-            if value:
-                schema[field] = self._get_meta_value(field, value)
+        for field, __, accessor in self._get_plan("schema"):
+            schema[field] = accessor(self, field)
         return schema
 
     def get_request(self):
@@ -248,16 +1538,164 @@ class ModelMeta(FullUrlMixin):
         """
         request = get_request()
         if request:
-            return request.build_absolute_uri(url)
+            return get_url_builder(request).build(url)
 
-        if not get_setting("USE_SITES"):
+        if not get_config().use_sites:
             raise RuntimeError(NEED_REQUEST_OBJECT_ERR_MSG)
 
         return self._get_full_url(url)
 
+    def get_json_ld_id(self):
+        """
+        Identifier of the object in the JSON-LD graph (see :py:class:`~meta.graph.JsonLdGraph`).
+
+        By default, it's the object full URL with the model name as fragment, or the object
+        :py:attr:`_local_key` if the object has no URL.
+
+        :return: string
+        """
+        try:
+            url = self.get_absolute_url()
+        except AttributeError:
+            url = None
+        if url:
+            try:
+                return "{}#{}".format(self.build_absolute_uri(url), self._meta.model_name)
+            except RuntimeError:
+                pass
+        return "#{}".format(self._local_key)
+
     def mainEntityOfPage(self):
         return {"@type": "WebPage", "@id": self.build_absolute_uri(self.get_absolute_url())}
 
     @property
     def _local_key(self):
         return "{}:{}:{}".format(self._meta.app_label, self._meta.model_name, self.pk)
+
+
+def _lookup_model_schema(builder, item, depth):
+    """
+    Retrieve the schema of a :py:class:`ModelMeta` object included in another object schema, if already built.
+
+    :param builder: :py:class:`~meta.schema.SchemaBuilder` instance
+    :param item: ModelMeta instance
+    :param depth: depth of the object including it
+    :return: schema, ``None`` if the object is a parent of the current one, :py:data:`~meta.schema.OMITTED` if
+             it exceeds the limits, ``_missing`` if the schema must be built
+    """
+    key = item._local_key
+    memo = builder.memo
+    # a parent object is referenced by its children: stop recursion here
+    if key in memo.visiting:
+        builder.truncate(key)
+        return None
+    schema = memo.schemas.get(key)
+    if schema is not None:
+        builder.depend(key, memo.dependencies.get(key, ()))
+    else:
+        if builder.context:
+            schema, dependencies = schema_cache.get_entry(key, builder.context)
+        if schema:
+            memo.schemas[key] = schema
+            memo.dependencies[key] = dependencies
+            builder.depend(key, dependencies)
+        elif builder.can_enter(depth + 1):
+            schema = _missing
+        else:
+            schema = builder.omit()
+    return schema
+
+
+@register_schema_handler(ModelMeta)
+def _build_model_schema(builder, item, depth):
+    """
+    Build the schema of a :py:class:`ModelMeta` object included in another object schema
+
+    Each object schema is built once in the current :py:func:`~meta.utils.schema_scope`.
+    """
+    schema = _lookup_model_schema(builder, item, depth)
+    if schema is _missing:
+        get_type = partial(item._get_schemaorg_type, builder.request)
+        schema = builder.enter(item.schema, item._local_key, get_type, depth + 1)
+    return schema
+
+
+@register_schema_handler(ModelMeta, asynchronous=True)
+async def _abuild_model_schema(builder, item, depth):
+    """
+    Asynchronous version of :py:func:`_build_model_schema`, resolving the object schema with
+    :py:meth:`ModelMeta._aresolve_schema`
+    """
+    schema = _lookup_model_schema(builder, item, depth)
+    if schema is _missing:
+        values, schemaorg_type = await asyncio.gather(
+            item._aresolve_schema(builder.request), item._aget_schemaorg_type(builder.request)
+        )
+        schema = builder.enter(values, item._local_key, lambda: schemaorg_type, depth + 1)
+    return schema
+
+
+@register_schema_handler(RelatedItems)
+def _convert_related_items(builder, value, depth):
+    output = []
+    builder.push_iterator(value.stream(), output, depth)
+    return output
+
+
+@register_schema_handler(RelatedItems, asynchronous=True)
+async def _aconvert_related_items(builder, value, depth):
+    items = [item async for item in value.queryset]
+    output = [None] * len(items)
+    builder.push_items(enumerate(items), output, depth)
+    return output
+
+
+class MetaQuerySet(QuerySet):
+    """
+    QuerySet for :py:class:`ModelMeta` models
+    """
+
+    def with_meta(self, max_depth=2):
+        """
+        Fetch the relations used in the model :py:attr:`~ModelMeta._metadata` and :py:attr:`~ModelMeta._schema`
+        along with the objects.
+
+        Single valued relations are added to ``select_related``, multi valued ones to ``prefetch_related``.
+        Relations accessed in model methods cannot be detected and must be added explicitly.
+        Aggregates (e.g.: ``Count("comments")``) are computed in the same query with ``annotate``, each one
+        in its own subquery.
+
+        :param max_depth: number of relations levels to follow through related :py:class:`ModelMeta` models
+        :return: queryset
+        """
+        select_related, prefetch_related = self.model._get_related_lookups(max_depth)
+        queryset = self
+        annotations = self.model._get_aggregate_annotations()
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def as_meta_many(self, request=None):
+        """
+        Build the :py:class:`~meta.views.Meta` objects for the queryset objects.
+
+        See :py:meth:`ModelMeta.as_meta_many`.
+        """
+        return self.model.as_meta_many(self, request)
+
+
+MetaManager = Manager.from_queryset(MetaQuerySet)
+
+
+@receiver(setting_changed)
+def reset_plans(setting, **kwargs):
+    """
+    Discard the cached resolution plans when settings change, as they include the defaults read from the settings
+    (see :py:meth:`ModelMeta._get_metadata_default`)
+    """
+    if setting.startswith("META_"):
+        _plans.clear()
@@ -0,0 +1,400 @@
+import inspect
+from datetime import date
+
+from .cache import schema_cache
+from .settings import get_config
+
+_handlers = {}
+_async_handlers = {}
+_class_handlers = {}
+#: marks the stack entries completing an object schema
+_COMPLETE = object()
+#: marks the stack entries converting the next value of an iterator
+_NEXT = object()
+#: value of the objects omitted because of the schema limits, see :py:meth:`SchemaBuilder.omit`
+OMITTED = object()
+
+
+def register_schema_handler(*types, asynchronous=False):
+    """
+    Decorator registering the function converting the values of the given types found in the schemas.
+
+    The function is called with the :py:class:`SchemaBuilder` instance, the value and the depth of the object
+    including it, and returns the converted value. Values whose class (or any of its bases) has no handler
+    are included as they are.
+
+    Coroutine functions can be registered with ``asynchronous=True``: they are used in place of the synchronous
+    handler of the same class when the schema is built by :py:meth:`SchemaBuilder.arun` (e.g.: to fetch data with
+    the asynchronous ORM interface).
+
+    :param types: classes handled by the function
+    :param asynchronous: register a coroutine function, used when building schemas asynchronously
+    :return: decorator
+    """
+
+    def decorator(func):
+        for cls in types:
+            (_async_handlers if asynchronous else _handlers)[cls] = func
+        _class_handlers.clear()
+        return func
+
+    return decorator
+
+
+def get_schema_handler(cls, asynchronous=False):
+    """
+    Retrieve the function converting the instances of the given class, see :py:func:`register_schema_handler`
+
+    :param cls: value class
+    :param asynchronous: include the handlers registered for asynchronous conversion
+    :return: function or ``None``
+    """
+    try:
+        return _class_handlers[cls, asynchronous]
+    except KeyError:
+        handler = None
+        for base in cls.__mro__:
+            handler = (asynchronous and _async_handlers.get(base)) or _handlers.get(base)
+            if handler is not None:
+                break
+        _class_handlers[cls, asynchronous] = handler
+        return handler
+
+
+class _Frame:
+    """
+    Object whose schema is being built
+    """
+
+    __slots__ = ("key", "partial", "dependencies")
+
+    def __init__(self, key):
+        self.key = key
+        #: whether any nested object has been omitted (see :py:meth:`SchemaBuilder.truncate`)
+        self.partial = False
+        #: keys of the objects included in the schema, at any depth
+        self.dependencies = set()
+
+
+class SchemaBuilder:
+    """
+    Build schemas by visiting their values with an explicit stack instead of recursion.
+
+    Objects included in the schemas (e.g.: :py:class:`~meta.models.ModelMeta` instances) nested deeper than
+    :ref:`META_SCHEMA_MAX_DEPTH`, or exceeding :ref:`META_SCHEMA_MAX_ENTITIES`, are removed from lists and
+    replaced by ``None`` elsewhere. Schemas missing any nested object are partial: they are neither stored
+    in the memo nor in the cache.
+    """
+
+    __slots__ = (
+        "memo",
+        "context",
+        "request",
+        "max_depth",
+        "max_entities",
+        "entities",
+        "_stack",
+        "_frames",
+        "_omitted",
+    )
+
+    def __init__(self, memo, context=None, request=None):
+        """
+        :param memo: current :py:class:`~meta.utils.SchemaMemo`
+        :param context: schema cache context, if cache is enabled
+        :param request: optional request object
+        """
+        config = get_config()
+        self.memo = memo
+        self.context = context
+        self.request = request
+        self.max_depth = config.schema_max_depth
+        self.max_entities = config.schema_max_entities
+        #: number of objects whose schema has been built
+        self.entities = 0
+        self._stack = []
+        #: objects whose schema is being built by this instance, outermost first
+        self._frames = []
+        #: lists including omitted objects, which are removed once all the values are converted
+        self._omitted = []
+
+    def can_enter(self, depth):
+        """
+        Check if an object schema can be built at the given depth, according to the limits
+
+        :param depth: depth of the object
+        :return: bool
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return self.max_entities is None or self.entities < self.max_entities
+
+    def enter(self, schema, key, get_type, depth, on_complete=None):
+        """
+        Start building an object schema: its values are converted when the stack is processed by :py:meth:`run`
+
+        :param schema: object schema
+        :param key: object key (see :py:attr:`~meta.models.ModelMeta._local_key`) to store the schema
+                    in the memo and cache, ``None`` if the object is not identified
+        :param get_type: function returning the schema type, if not set in the schema
+        :param depth: depth of the object
+        :param on_complete: function called with the schema once it's complete
+        :return: object schema being built
+        """
+        output = {}
+        frame = self.open_object(key)
+        self._stack.append((_COMPLETE, output, (frame, get_type, on_complete), depth))
+        self.push_items(schema.items(), output, depth)
+        return output
+
+    def open_object(self, key):
+        """
+        Mark an object as being built, until :py:meth:`close_object` is called.
+
+        Called by :py:meth:`enter`, it's used directly when the object schema is not built by this instance
+        (e.g.: the object whose schema is serialized by :py:meth:`~meta.views.BaseMeta.as_json_ld`).
+
+        :param key: object key, ``None`` if the object is not identified
+        :return: object frame
+        """
+        self.entities += 1
+        # object is marked as visited until its schema is complete: if we are visiting parent -> child
+        # relation, we don't need the pointer back up
+        if key:
+            self.memo.visiting.add(key)
+        frame = _Frame(key)
+        self._frames.append(frame)
+        return frame
+
+    def close_object(self):
+        """
+        Mark the last object opened by :py:meth:`open_object` as complete.
+
+        The objects included in its schema are recorded in the memo, and they are added to the objects
+        included by the parent object.
+
+        :return: object frame
+        """
+        frame = self._frames.pop()
+        if frame.key:
+            self.memo.visiting.discard(frame.key)
+            self.memo.dependencies[frame.key] = frozenset(frame.dependencies)
+            self.depend(frame.key, frame.dependencies)
+        elif self._frames:
+            self._frames[-1].dependencies.update(frame.dependencies)
+        return frame
+
+    def depend(self, key, dependencies=()):
+        """
+        Record that the schema being built includes an object: the schema must be invalidated when the object,
+        or any object included in its schema, changes.
+
+        :param key: included object key
+        :param dependencies: keys of the objects included in the object schema
+        """
+        if self._frames:
+            frame_dependencies = self._frames[-1].dependencies
+            frame_dependencies.add(key)
+            frame_dependencies.update(dependencies)
+
+    def truncate(self, key=None):
+        """
+        Mark the schemas being built as partial, as a nested object is omitted
+
+        :param key: key of the omitted object if it's omitted because its schema is being built (i.e.: it's a parent
+                    of the current object), ``None`` if it exceeds the limits
+        """
+        frames = self._frames
+        start = 0
+        if key:
+            # parent schema is complete without the pointer back to itself, only its descendants are partial
+            start = next((index + 1 for index in range(len(frames) - 1, -1, -1) if frames[index].key == key), 0)
+        for frame in frames[start:]:
+            frame.partial = True
+
+    def omit(self):
+        """
+        Omit an object exceeding the limits: the schemas being built are marked as partial (see :py:meth:`truncate`).
+
+        :return: value to be returned by the handler converting the object: the object is removed from lists,
+                 and replaced by ``None`` elsewhere
+        """
+        self.truncate()
+        return OMITTED
+
+    def _store(self, target, index, value):
+        if value is OMITTED:
+            if isinstance(target, list):
+                self._omitted.append(target)
+            else:
+                value = None
+        target[index] = value
+
+    def _remove_omitted(self):
+        for target in self._omitted:
+            target[:] = [value for value in target if value is not OMITTED]
+        self._omitted.clear()
+
+    def push_items(self, items, target, depth):
+        """
+        Schedule the conversion of the given values
+
+        :param items: (index, value) pairs
+        :param target: list or dict where converted values are stored
+        :param depth: depth of the object including the values
+        """
+        stack = self._stack
+        # pushed in reverse order, so that they are converted (and added to dicts) in their original order
+        for index, value in reversed(tuple(items)):
+            stack.append((value, target, index, depth))
+
+    def push_iterator(self, iterator, target, depth):
+        """
+        Schedule the conversion of the values of an iterator, which are read one at a time
+
+        :param iterator: iterator
+        :param target: list where converted values are appended
+        :param depth: depth of the object including the values
+        """
+        self._stack.append((_NEXT, target, iterator, depth))
+
+    def _complete(self, output, frame, get_type, on_complete):
+        if "@type" not in output:
+            output["@type"] = get_type()
+        self.close_object()
+        key = frame.key
+        if frame.partial:
+            # schema depends on the objects including it, it can't be reused
+            return
+        if key:
+            # after generating the full schema, we can save it in the scope for future uses
+            self.memo.schemas[key] = output
+            if self.context:
+                schema_cache.set(key, self.context, output, frame.dependencies)
+        if on_complete:
+            on_complete(output)
+
+    def get_handler(self, cls, asynchronous=False):
+        """
+        Retrieve the function converting the instances of the given class, see :py:func:`get_schema_handler`
+
+        :param cls: value class
+        :param asynchronous: include the handlers registered for asynchronous conversion
+        :return: function or ``None``
+        """
+        return get_schema_handler(cls, asynchronous)
+
+    def _next_conversion(self, asynchronous=False):
+        """
+        Process the stack up to the next value converted by a handler
+
+        :param asynchronous: include the handlers registered for asynchronous conversion
+        :return: tuple of handler, value, target, index and depth, ``None`` if the stack is empty
+        """
+        stack = self._stack
+        while stack:
+            value, target, index, depth = stack.pop()
+            if value is _COMPLETE:
+                self._complete(target, *index)
+                continue
+            if value is _NEXT:
+                # next value is read only when the previous one has been converted
+                item = next(index, _NEXT)
+                if item is not _NEXT:
+                    target.append(None)
+                    stack.append((value, target, index, depth))
+                    stack.append((item, target, len(target) - 1, depth))
+                continue
+            handler = self.get_handler(value.__class__, asynchronous)
+            if handler is None:
+                target[index] = value
+                continue
+            return handler, value, target, index, depth
+        # all the values are converted: lists are complete
+        self._remove_omitted()
+        return None
+
+    def _abort(self):
+        self._stack.clear()
+        self._omitted.clear()
+        self.memo.visiting.difference_update(frame.key for frame in self._frames if frame.key)
+        self._frames.clear()
+
+    def run(self):
+        """
+        Convert all the scheduled values
+        """
+        try:
+            while (entry := self._next_conversion()) is not None:
+                handler, value, target, index, depth = entry
+                self._store(target, index, handler(self, value, depth))
+        except BaseException:
+            self._abort()
+            raise
+
+    async def arun(self):
+        """
+        Asynchronous version of :py:meth:`run`, using the handlers registered for asynchronous conversion
+        """
+        try:
+            while (entry := self._next_conversion(asynchronous=True)) is not None:
+                handler, value, target, index, depth = entry
+                converted = handler(self, value, depth)
+                if inspect.isawaitable(converted):
+                    converted = await converted
+                self._store(target, index, converted)
+        except BaseException:
+            self._abort()
+            raise
+
+    def build(self, schema, key, get_type, depth=0, on_complete=None):
+        """
+        Build an object schema, see :py:meth:`enter`
+
+        :return: object schema
+        """
+        output = self.enter(schema, key, get_type, depth, on_complete)
+        self.run()
+        return output
+
+    async def abuild(self, schema, key, get_type, depth=0, on_complete=None):
+        """
+        Asynchronous version of :py:meth:`build`
+
+        :return: object schema
+        """
+        output = self.enter(schema, key, get_type, depth, on_complete)
+        await self.arun()
+        return output
+
+    def convert(self, value, depth=0):
+        """
+        Convert a value included in an object schema
+
+        :param value: value to convert
+        :param depth: depth of the object including the value
+        :return: converted value, :py:data:`OMITTED` if the value is omitted (see :py:meth:`omit`)
+        """
+        output = [None]
+        self._stack.append((value, output, 0, depth))
+        self.run()
+        return output[0] if output else OMITTED
+
+
+@register_schema_handler(date)
+def _convert_date(builder, value, depth):
+    return value.isoformat()
+
+
+@register_schema_handler(list, tuple)
+def _convert_sequence(builder, value, depth):
+    output = [None] * len(value)
+    builder.push_items(enumerate(value), output, depth)
+    return output
+
+
+@register_schema_handler(dict)
+def _convert_dict(builder, value, depth):
+    output = {}
+    builder.push_items(value.items(), output, depth)
+    return output
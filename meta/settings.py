@@ -1,4 +1,9 @@
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
 from django.conf import settings as django_settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 META_SITE_PROTOCOL = None
@@ -16,6 +21,18 @@ META_USE_JSON_LD_SCHEMA = False
 META_USE_SITES = False
 META_USE_TITLE_TAG = False
 META_OG_NAMESPACES = None
+META_USE_CACHE = False
+META_CACHE_ALIAS = "default"
+META_CACHE_TIMEOUT = 300
+META_SCHEMA_CACHE_SIZE = 0
+META_SCHEMA_MAX_DEPTH = None
+META_SCHEMA_MAX_ENTITIES = None
+META_EXECUTOR_MAX_WORKERS = None
+META_EXECUTOR_TIMEOUT = 1
+META_LAZY = False
+META_PRUNE_FIELDS = False
+META_JSON_LD_ENCODER = None
+META_JSON_LD_GRAPH = False
 
 
 OBJECT_TYPES = (
@@ -66,8 +83,104 @@ META_SCHEMAORG_TYPES = SCHEMAORG_TYPES
 params = {param: value for param, value in locals().items() if param.startswith("META_")}
 
 
+@dataclass(frozen=True)
+class MetaConfig:
+    """
+    Immutable snapshot of the django-meta settings.
+
+    Attributes are named after the settings, lowercase and without the ``META_`` prefix
+    (e.g.: ``use_sites`` for :ref:`META_USE_SITES`).
+
+    Use :py:func:`get_config` to retrieve the current snapshot.
+    """
+
+    site_protocol: Optional[str]
+    site_domain: Optional[str]
+    site_type: Optional[str]
+    site_name: Optional[str]
+    include_keywords: list
+    default_keywords: list
+    image_url: Optional[str]
+    use_og_properties: bool
+    use_twitter_properties: bool
+    use_facebook_properties: bool
+    use_schemaorg_properties: bool
+    use_json_ld_schema: bool
+    use_sites: bool
+    use_title_tag: bool
+    og_namespaces: Any
+    use_cache: bool
+    cache_alias: str
+    cache_timeout: Optional[int]
+    schema_cache_size: int
+    schema_max_depth: Optional[int]
+    schema_max_entities: Optional[int]
+    executor_max_workers: Optional[int]
+    executor_timeout: float
+    lazy: bool
+    prune_fields: bool
+    json_ld_encoder: Optional[str]
+    json_ld_graph: bool
+    og_secure_url_items: tuple
+    default_image: str
+    default_type: str
+    fb_type: str
+    fb_types: tuple
+    fb_appid: str
+    fb_profile_id: str
+    fb_publisher: str
+    fb_author_url: str
+    fb_pages: str
+    twitter_type: str
+    twitter_types: tuple
+    twitter_site: str
+    twitter_author: str
+    schemaorg_type: str
+    schemaorg_types: tuple
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Build the snapshot from django settings with fallback to globals defaults.
+
+        :return: MetaConfig instance
+        """
+        values = {}
+        for field in fields(cls):
+            name = "META_%s" % field.name.upper()
+            values[field.name] = getattr(django_settings, name, params[name])
+        return cls(**values)
+
+
+_config = None
+
+
+def get_config():
+    """
+    Retrieve the settings snapshot, building it on first use.
+
+    Snapshot is rebuilt when any ``META_*`` setting is changed through the ``setting_changed`` signal
+    (e.g.: by :py:func:`django.test.override_settings`).
+
+    :return: :py:class:`MetaConfig` instance
+    """
+    global _config
+    config = _config
+    if config is None:
+        config = _config = MetaConfig.from_settings()
+    return config
+
+
+@receiver(setting_changed)
+def reset_config(setting, **kwargs):
+    """
+    Discard the settings snapshot when django-meta settings change
+    """
+    global _config
+    if setting.startswith("META_"):
+        _config = None
+
+
 def get_setting(name):
     """Get setting value from django settings with fallback to globals defaults."""
-    from django.conf import settings
-
-    return getattr(settings, "META_%s" % name, params["META_%s" % name])
+    return getattr(get_config(), name.lower())
@@ -0,0 +1,75 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http.request import split_domain_port
+
+_domains = {}
+
+
+def _get_site_model():
+    try:
+        return apps.get_model("sites.Site")
+    except LookupError:
+        raise ImproperlyConfigured("Add django.contrib.sites to INSTALLED_APPS because META_USE_SITES is True")
+
+
+def _get_key(request):
+    """
+    Build the domain cache key for the current site: ``SITE_ID`` if set, the request host otherwise.
+    """
+    site_id = getattr(settings, "SITE_ID", "")
+    if site_id:
+        return "id:{}".format(site_id)
+    if request is not None:
+        return "host:{}".format(request.get_host().lower())
+    return None
+
+
+def get_site_domain(request=None):
+    """
+    Retrieve the domain of the current :py:class:`django.contrib.sites.models.Site`.
+
+    Domains are cached per request and per process, by ``SITE_ID`` if set, by request host otherwise;
+    the process cache is cleared when any site is saved or deleted, only in the process saving it
+    (as ``SITE_CACHE`` in :py:mod:`django.contrib.sites`): other processes keep the previous domain until
+    they are restarted or :py:func:`clear_site_domains` is called.
+
+    :param request: optional request object
+    :return: site domain
+    """
+    try:
+        return request._meta_site_domain
+    except AttributeError:
+        pass
+    key = _get_key(request)
+    domain = _domains.get(key)
+    if domain is None and key and key.startswith("host:"):
+        # fallback to the host without the port, as in the sites framework
+        domain = _domains.get("host:{}".format(split_domain_port(key[5:])[0]))
+    if domain is None:
+        domain = _get_site_model().objects.get_current(request).domain
+        if key:
+            _domains[key] = domain
+    if request is not None:
+        request._meta_site_domain = domain
+    return domain
+
+
+def warm_site_domains():
+    """
+    Load the domains of all the sites in the process cache, to avoid querying them when rendering.
+
+    Call it at startup, e.g. in your WSGI / ASGI module after the application is created.
+    """
+    domains = {}
+    for site_id, domain in _get_site_model().objects.values_list("pk", "domain"):
+        domains["id:{}".format(site_id)] = domain
+        domains["host:{}".format(domain.lower())] = domain
+    _domains.update(domains)
+
+
+def clear_site_domains(**kwargs):
+    """
+    Clear the process cache of the site domains
+    """
+    _domains.clear()
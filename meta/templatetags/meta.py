@@ -6,7 +6,9 @@ from django.apps import apps
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
 
-from ..settings import get_setting
+from ..graph import JsonLdGraph
+from ..settings import get_config
+from ..views import BaseMeta
 
 register = template.Library()
 
@@ -124,7 +126,7 @@ def og_prop(name, value):
     :param name: property name (without 'og:' namespace)
     :param value: property value
     """
-    if not isinstance(value, dict) and name in get_setting("OG_SECURE_URL_ITEMS") and value.startswith("https"):
+    if not isinstance(value, dict) and name in get_config().og_secure_url_items and value.startswith("https"):
         data = {name: value, "%s:secure_url" % name: value}
     elif not isinstance(value, dict):
         data = {
@@ -218,6 +220,31 @@ def googleplus_scope(value):
     return schemaorg_html_scope(value)
 
 
+_json_ld_escapes = {ord("<"): "\\u003C", ord(">"): "\\u003E", ord("&"): "\\u0026"}
+
+
+@register.simple_tag(takes_context=True)
+def meta_json_ld_graph(context, *metas):
+    """
+    Renders a single JSON-LD script with the schema of all the given meta objects (or lists of meta objects),
+    where each object is included once (see :py:class:`~meta.graph.JsonLdGraph`).
+
+    :param metas: meta objects or lists of meta objects
+    """
+    graph = JsonLdGraph(context.get("request"))
+    for item in metas:
+        if isinstance(item, BaseMeta):
+            graph.add(item)
+        elif item:
+            for meta in item:
+                graph.add(meta)
+    if not graph.nodes:
+        return ""
+    return mark_safe(
+        '<script type="application/ld+json">{}</script>'.format(graph.as_json_ld().translate(_json_ld_escapes))
+    )
+
+
 @register.simple_tag(takes_context=True)
 def meta_namespaces(context):
     """
@@ -1,10 +1,38 @@
 import contextlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import lru_cache
+
+from .settings import get_config
 
 try:
     from asgiref.local import Local
 except ImportError:
     from threading import local as Local  # noqa: N812
 _thread_locals = Local()
+_schema_memo = ContextVar("meta_schema_memo", default=None)
+_executor = None
+_executor_lock = threading.Lock()
+#: domain-less URLs that :py:meth:`django.http.request.HttpRequest.build_absolute_uri` leaves untouched
+_plain_path = re.compile(r"/(?!/)[\w.\-~/#%\[\]=:;$&()+,!?*@']*\Z", re.ASCII)
+
+
+class SchemaMemo:
+    """
+    Schemas of the :py:class:`~meta.models.ModelMeta` objects built in the current scope
+    """
+
+    def __init__(self):
+        #: completed schemas by object key
+        self.schemas = {}
+        #: keys of the objects whose schema is being built, used to stop recursion
+        self.visiting = set()
+        #: completed schemas serialized to JSON by object key
+        self.fragments = {}
+        #: keys of the objects included in the schemas, at any depth, by object key
+        self.dependencies = {}
 
 
 @contextlib.contextmanager
@@ -21,3 +49,133 @@ def get_request():
     Retrieve request from current instance
     """
     return getattr(_thread_locals, "_request", None)
+
+
+class UrlBuilder:
+    """
+    Build full URLs from a protocol and domain computed once.
+    """
+
+    __slots__ = ("protocol", "domain", "prefix", "cache_key")
+
+    def __init__(self, protocol, domain):
+        if domain.startswith("http"):
+            protocol = ""
+            self.prefix = domain
+        else:
+            self.prefix = "{}://{}".format(protocol, domain)
+        self.protocol = protocol
+        self.domain = domain
+        #: identifies the URLs built by this object, to cache values derived from them
+        self.cache_key = self.prefix
+
+    def build(self, url):
+        """
+        Build the full URL (protocol and domain included) for the URL given as argument
+
+        :param url: absolute (domain-less) URL
+        :return: full url
+        """
+        if not url:
+            return None
+        if url.startswith("http"):
+            return url
+        if url.startswith("//"):
+            return "{}:{}".format(self.protocol, url) if self.protocol else url
+        if not url.startswith("/"):
+            url = "/" + url
+        return self.prefix + url
+
+
+@lru_cache(maxsize=64)
+def get_domain_url_builder(protocol, domain):
+    """
+    Retrieve the URL builder for the protocol and domain, shared by all the objects.
+
+    :param protocol: website protocol
+    :param domain: website domain
+    :return: :py:class:`UrlBuilder` instance
+    """
+    return UrlBuilder(protocol, domain)
+
+
+class RequestUrlBuilder:
+    """
+    Build full URLs for the current request.
+
+    Plain paths are joined to the request scheme and host; other URLs are handled by
+    :py:meth:`django.http.request.HttpRequest.build_absolute_uri`.
+    """
+
+    __slots__ = ("request", "prefix", "cache_key")
+
+    def __init__(self, request):
+        self.request = request
+        self.prefix = "{}://{}".format(request.scheme, request.get_host())
+        #: identifies the URLs built by this object, to cache values derived from them: relative URLs depend
+        #: on the request path
+        self.cache_key = (self.prefix, request.path)
+
+    def build(self, url):
+        """
+        Build the full URL (protocol and domain included) for the URL given as argument
+
+        :param url: URL, or ``None`` for the current page URL
+        :return: full url
+        """
+        if url and _plain_path.match(url) and "/./" not in url and "/../" not in url:
+            return self.prefix + url
+        return self.request.build_absolute_uri(url)
+
+
+def get_url_builder(request):
+    """
+    Retrieve the URL builder for the request, creating it on first use.
+
+    :param request: request object
+    :return: :py:class:`RequestUrlBuilder` instance
+    """
+    try:
+        return request._meta_url_builder
+    except AttributeError:
+        request._meta_url_builder = RequestUrlBuilder(request)
+        return request._meta_url_builder
+
+
+@contextlib.contextmanager
+def schema_scope():
+    """
+    Context manager sharing the :py:class:`~meta.models.ModelMeta` objects schemas built within the block.
+
+    Nested scopes reuse the outermost one; schemas are discarded when the outermost scope exits.
+
+    :return: :py:class:`SchemaMemo` instance
+    """
+    memo = _schema_memo.get()
+    if memo is not None:
+        yield memo
+        return
+    memo = SchemaMemo()
+    token = _schema_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        _schema_memo.reset(token)
+
+
+def get_executor():
+    """
+    Retrieve the thread pool shared by all the models to run slow metadata providers.
+
+    Pool is created on first use, with :ref:`META_EXECUTOR_MAX_WORKERS` threads.
+
+    :return: :py:class:`concurrent.futures.ThreadPoolExecutor` instance
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_config().executor_max_workers, thread_name_prefix="django-meta"
+                )
+    return _executor
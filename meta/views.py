@@ -1,17 +1,175 @@
 import json
+import re
 import warnings
-from datetime import date
+from functools import lru_cache, partial
+from uuid import uuid4
 
-from django.apps import apps
 from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .cache import fragment_cache, get_cache_context
+from .schema import OMITTED, SchemaBuilder, get_schema_handler, register_schema_handler
+from .settings import get_config
+from .sites import get_site_domain
+from .utils import get_domain_url_builder, get_url_builder, schema_scope
+
+OUTPUT_FLAGS = {
+    "use_og": "use_og_properties",
+    "use_twitter": "use_twitter_properties",
+    "use_facebook": "use_facebook_properties",
+    "use_schemaorg": "use_schemaorg_properties",
+    "use_json_ld": "use_json_ld_schema",
+    "use_title_tag": "use_title_tag",
+}
+"""
+Flags enabling each output, with the :py:class:`~meta.settings.MetaConfig` attribute providing their default value
+"""
+
+FIELD_OUTPUTS = {
+    "og_title": ("use_og",),
+    "og_description": ("use_og",),
+    "og_type": ("use_og",),
+    "og_author": ("use_og",),
+    "og_author_url": ("use_og",),
+    "og_publisher": ("use_og",),
+    "og_app_id": ("use_og",),
+    "og_profile_id": ("use_og",),
+    "facebook_app_id": ("use_og",),
+    "fb_pages": ("use_og",),
+    "object_type": ("use_og",),
+    "site_name": ("use_og",),
+    "expiration_time": ("use_og",),
+    "tag": ("use_og",),
+    "locale": ("use_og",),
+    "image_width": ("use_og",),
+    "image_height": ("use_og",),
+    "image": ("use_og", "use_twitter", "use_schemaorg"),
+    "image_object": ("use_og", "use_twitter", "use_schemaorg"),
+    "published_time": ("use_og", "use_schemaorg"),
+    "modified_time": ("use_og", "use_schemaorg"),
+    "twitter_title": ("use_twitter",),
+    "twitter_description": ("use_twitter",),
+    "twitter_type": ("use_twitter",),
+    "twitter_card": ("use_twitter",),
+    "twitter_creator": ("use_twitter",),
+    "twitter_site": ("use_twitter",),
+    "schemaorg_title": ("use_schemaorg",),
+    "schemaorg_description": ("use_schemaorg",),
+    "schemaorg_type": ("use_schemaorg", "use_json_ld"),
+    "schema": ("use_json_ld",),
+}
+"""
+Outputs (identified by their flag in :py:data:`OUTPUT_FLAGS`) rendering each field in ``meta/meta.html``.
+
+Fields not listed here (e.g.: ``title``, ``description``, ``url``, custom fields) are used by any output
+and are always resolved.
+"""
+
+
+@lru_cache(maxsize=None)
+def get_pruned_fields(outputs):
+    """
+    Fields not used by any of the given outputs
+
+    :param outputs: frozenset of enabled output flags (see :py:data:`OUTPUT_FLAGS`)
+    :return: frozenset of field names
+    """
+    return frozenset(field for field, field_outputs in FIELD_OUTPUTS.items() if outputs.isdisjoint(field_outputs))
+
+
+@lru_cache(maxsize=None)
+def _import_json_ld_encoder(path):
+    if path:
+        try:
+            return import_string(path)
+        except ImportError:
+            warnings.warn(
+                "META_JSON_LD_ENCODER {} cannot be imported, json.dumps is used instead".format(path),
+                RuntimeWarning,
+                stacklevel=3,
+            )
+    return json.dumps
+
+
+def get_json_ld_encoder():
+    """
+    Retrieve the function serializing the JSON-LD data according to :ref:`META_JSON_LD_ENCODER`.
+
+    :return: callable accepting the data and a ``default`` keyword argument, returning a string or bytes
+    """
+    return _import_json_ld_encoder(get_config().json_ld_encoder)
+
+
+def encode_json_ld(data, encoder=None, **kwargs):
+    """
+    Serialize data to JSON
+
+    :param data: data to serialize
+    :param encoder: function serializing the data, :py:func:`get_json_ld_encoder` if not given
+    :param kwargs: extra arguments passed to the encoder (e.g.: ``default``)
+    :return: string
+    """
+    json_ld = (encoder or get_json_ld_encoder())(data, **kwargs)
+    if isinstance(json_ld, bytes):
+        json_ld = json_ld.decode("utf-8")
+    return json_ld
+
+
+def _get_object_fragment(item, builder, encoder):
+    """
+    Retrieve the schema of a :py:class:`~meta.models.ModelMeta` object included in another object schema,
+    serialized to JSON
+
+    :param item: ModelMeta instance
+    :param builder: :py:class:`~meta.schema.SchemaBuilder` of the including object
+    :param encoder: function serializing the schema
+    :return: JSON fragment, ``None`` if object is a parent of the current one, :py:data:`~meta.schema.OMITTED`
+             if it exceeds the schema limits
+    """
+    key = item._local_key
+    memo = builder.memo
+    if key in memo.visiting:
+        return None
+    fragment = memo.fragments.get(key)
+    if fragment is not None:
+        builder.depend(key, memo.dependencies.get(key, ()))
+        return fragment
+    if builder.context:
+        fragment, dependencies = fragment_cache.get_entry(key, builder.context)
+        if fragment:
+            memo.dependencies[key] = dependencies
+            builder.depend(key, dependencies)
+    if not fragment:
+        schema = builder.convert(item)
+        if schema is None or schema is OMITTED:
+            return schema
+        # built schema only contains json types, no default function is needed
+        fragment = encode_json_ld(schema, encoder)
+        if memo.schemas.get(key) is not schema:
+            # partial schema (see SchemaBuilder.truncate), it can't be reused
+            return fragment
+        if builder.context:
+            fragment_cache.set(key, builder.context, fragment, memo.dependencies[key])
+    memo.fragments[key] = fragment
+    return fragment
+
+
+def _remove_omitted(json_ld, marker):
+    """
+    Remove the objects omitted because of the schema limits from the serialized schema: they are removed from
+    arrays, and replaced by ``null`` elsewhere (see :py:meth:`meta.schema.SchemaBuilder.omit`)
+
+    :param json_ld: serialized schema
+    :param marker: JSON string serialized in place of the omitted objects
+    :return: json
+    """
+    marker = re.escape(marker)
+    json_ld = re.sub(r"(:\s*){}".format(marker), r"\1null", json_ld)
+    return re.sub(r"{0}\s*,\s*|\s*,\s*{0}|{0}".format(marker), "", json_ld)
 
-from .settings import get_setting
 
-# This global variable is used to cache schemas for visited models to avoid recursion errors when traversing
-# when parent and its children has a reference to each other
-# When one objects if visited, its schema is put there, in a key generated from its pk
-# By adding here visited items, it can be used as a local cache, to stop recursion
-visited = {}
+IMAGE_URLS_CACHE_SIZE = 256
+_image_urls = {}
 
 
 class FullUrlMixin:
@@ -21,11 +179,13 @@ class FullUrlMixin:
     If possible, :py:meth:`django.http.request.HttpRequest.build_absolute_uri` is used
     """
 
+    __slots__ = ()
+
     def get_domain(self):
         """
         Discover the current website domain
 
-        :py:class:`django.contrib.sites.models.Site`
+        :py:class:`django.contrib.sites.models.Site` (see :py:func:`meta.sites.get_site_domain`)
         and :ref:`META_SITE_DOMAIN`
         (in this order) are used
 
@@ -34,20 +194,14 @@ class FullUrlMixin:
         try:
             use_site = self.use_sites
         except AttributeError:
-            use_site = get_setting("USE_SITES")
+            use_site = get_config().use_sites
 
         if use_site:
-            try:
-                Site = apps.get_model("sites.Site")
-                try:
-                    return Site.objects.get_current(self.request).domain
-                except AttributeError:
-                    return Site.objects.get_current().domain
-            except LookupError:
-                raise ImproperlyConfigured("Add django.contrib.sites to INSTALLED_APPS because META_USE_SITES is True")
-        if not get_setting("SITE_DOMAIN"):
+            return get_site_domain(getattr(self, "request", None))
+        site_domain = get_config().site_domain
+        if not site_domain:
             raise ImproperlyConfigured("META_SITE_DOMAIN is not set")
-        return get_setting("SITE_DOMAIN")
+        return site_domain
 
     def get_protocol(self):
         """
@@ -55,9 +209,19 @@ class FullUrlMixin:
 
         :return: http or https depending on :ref:`META_SITE_PROTOCOL`
         """
-        if not get_setting("SITE_PROTOCOL"):
+        site_protocol = get_config().site_protocol
+        if not site_protocol:
             raise ImproperlyConfigured("META_SITE_PROTOCOL is not set")
-        return get_setting("SITE_PROTOCOL")
+        return site_protocol
+
+    def get_url_builder(self):
+        """
+        Retrieve the object used to build full URLs when no request is available, from :py:meth:`get_protocol`
+        and :py:meth:`get_domain`.
+
+        :return: :py:class:`~meta.utils.UrlBuilder` instance
+        """
+        return get_domain_url_builder(self.get_protocol(), self.get_domain())
 
     def _get_full_url(self, url):
         """
@@ -66,35 +230,26 @@ class FullUrlMixin:
         :param url: absolute (domain-less) URL
         :return: full url
         """
-        try:
-            return self.request.build_absolute_uri(url)
-        except AttributeError:
-            pass
+        request = getattr(self, "request", None)
+        if request is not None:
+            try:
+                return get_url_builder(request).build(url)
+            except AttributeError:
+                pass
         if not url:
             return None
         if url.startswith("http"):
             return url
-        meta_protocol = self.get_protocol()
-        domain = self.get_domain()
-        separator = "://"
-        if url.startswith("//"):
-            separator = ":"
-            domain = ""
-        elif not url.startswith("/"):
-            url = "/%s" % url
-        if domain.startswith("http"):
-            meta_protocol = ""
-            separator = ""
-        return "{meta_protocol}{separator}{domain}{url}".format(
-            meta_protocol=meta_protocol, separator=separator, domain=domain, url=url
-        )
+        return self.get_url_builder().build(url)
 
 
-class Meta(FullUrlMixin):
+class BaseMeta(FullUrlMixin):
     """
-    Helper for building context meta object
+    Common implementation of the context meta objects (:py:class:`Meta` and :py:class:`CompactMeta`).
     """
 
+    __slots__ = ()
+
     _keywords = []
     _url = None
     _image = None
@@ -107,49 +262,17 @@ class Meta(FullUrlMixin):
 
     See :ref:`a sample implementation <schema._schema>`.
     """
+    _schema_data = None
+    """
+    Processed schema, built on first access to :py:attr:`schema`
+    """
     request = None
     _obj = None
     """
     Linked :py:class:`~meta.models.ModelMeta` instance (if Meta is generated from a ModelMeta object)
     """
-
-    def __init__(self, **kwargs):
-        self.request = kwargs.get("request", None)
-        self.use_sites = kwargs.get("use_sites", get_setting("USE_SITES"))
-        self.title = kwargs.get("title")
-        self.og_title = kwargs.get("og_title")
-        self.twitter_title = kwargs.get("twitter_title")
-        self.schemaorg_title = kwargs.get("schemaorg_title")
-        self.schemaorg_description = kwargs.get("schemaorg_description")
-        self.description = kwargs.get("description")
-        self.extra_props = kwargs.get("extra_props")
-        self.extra_custom_props = kwargs.get("extra_custom_props")
-        self.custom_namespace = kwargs.get("custom_namespace", get_setting("OG_NAMESPACES"))
-        self.keywords = kwargs.get("keywords")
-        self.url = kwargs.get("url")
-        self.image = kwargs.get("image")
-        self.image_object = kwargs.get("image_object")
-        self.image_width = kwargs.get("image_width")
-        self.image_height = kwargs.get("image_height")
-        self.object_type = kwargs.get("object_type", get_setting("SITE_TYPE"))
-        self.site_name = kwargs.get("site_name", get_setting("SITE_NAME"))
-        self.twitter_site = kwargs.get("twitter_site")
-        self.twitter_creator = kwargs.get("twitter_creator")
-        self.twitter_type = kwargs.get("twitter_type", kwargs.get("twitter_card", get_setting("TWITTER_TYPE")))
-        self.twitter_card = self.twitter_type
-        self.facebook_app_id = kwargs.get("facebook_app_id")
-        self.locale = kwargs.get("locale")
-        self.use_og = kwargs.get("use_og", get_setting("USE_OG_PROPERTIES"))
-        self.use_twitter = kwargs.get("use_twitter", get_setting("USE_TWITTER_PROPERTIES"))
-        self.use_facebook = kwargs.get("use_facebook", get_setting("USE_FACEBOOK_PROPERTIES"))
-        self.use_schemaorg = kwargs.get("use_schemaorg", get_setting("USE_SCHEMAORG_PROPERTIES"))
-        self.use_json_ld = kwargs.get("use_json_ld", get_setting("USE_JSON_LD_SCHEMA"))
-        self.use_title_tag = kwargs.get("use_title_tag", get_setting("USE_TITLE_TAG"))
-        self.schemaorg_type = kwargs.get("schemaorg_type", get_setting("SCHEMAORG_TYPE"))
-        self.fb_pages = kwargs.get("fb_pages", get_setting("FB_PAGES"))
-        self.og_app_id = kwargs.get("og_app_id", get_setting("FB_APPID"))
-        self._schema = kwargs.get("schema", {})
-        self._obj = kwargs.get("obj", {})
+    _domain = None
+    _url_builder = None
 
     @property
     def keywords(self):
@@ -158,14 +281,15 @@ class Meta(FullUrlMixin):
     @keywords.setter
     def keywords(self, keywords):
         if keywords is None:
-            kws = get_setting("DEFAULT_KEYWORDS")
+            kws = get_config().default_keywords
         else:
             if not hasattr(keywords, "__iter__"):
                 # Not iterable
                 raise ValueError("Keywords must be an iterable")
             kws = list(keywords)
-            if get_setting("INCLUDE_KEYWORDS"):
-                kws += get_setting("INCLUDE_KEYWORDS")
+            include_keywords = get_config().include_keywords
+            if include_keywords:
+                kws += include_keywords
         seen = set()
         seen_add = seen.add
         self._keywords = [k for k in kws if k not in seen and not seen_add(k)]
@@ -173,6 +297,28 @@ class Meta(FullUrlMixin):
     def get_full_url(self, url):
         return self._get_full_url(url)
 
+    def get_domain(self):
+        """
+        Discover the current website domain (see :py:meth:`FullUrlMixin.get_domain`), computed once per object
+
+        :return: domain URL
+        """
+        if self._domain is None:
+            self._domain = super().get_domain()
+        return self._domain
+
+    @property
+    def domain(self):
+        """
+        Current website domain, see :py:meth:`get_domain`
+        """
+        return self.get_domain()
+
+    def get_url_builder(self):
+        if self._url_builder is None:
+            self._url_builder = get_domain_url_builder(self.get_protocol(), self.get_domain())
+        return self._url_builder
+
     @property
     def url(self):
         return self._url
@@ -183,7 +329,7 @@ class Meta(FullUrlMixin):
 
     def _normalize_media_url(self, url):
         if not url.startswith("http") and not url.startswith("/"):
-            url = "{}{}".format(get_setting("IMAGE_URL"), url)
+            url = "{}{}".format(get_config().image_url, url)
         return self.get_full_url(url)
 
     @property
@@ -194,8 +340,8 @@ class Meta(FullUrlMixin):
 
     @image.setter
     def image(self, image):
-        if image is None and get_setting("DEFAULT_IMAGE"):
-            image = get_setting("DEFAULT_IMAGE")
+        if image is None:
+            image = get_config().default_image or None
         if image:
             self._image = self._normalize_media_url(image)
 
@@ -207,16 +353,60 @@ class Meta(FullUrlMixin):
     def image_object(self, image):
         try:
             if image:
-                image["url"] = self._normalize_media_url(image.get("url", None))
-                if self.get_protocol() == "https":
-                    secure_fallback_url = image.get("secure_url", image.get("url", None))
-                    image["secure_url"] = self._normalize_media_url(secure_fallback_url)
-                    if image["secure_url"].startswith("http://"):
-                        image["secure_url"] = image["secure_url"].replace("http://", "https://")
-                self._image_object = image
+                self._image_object = self._normalize_image_object(image)
         except KeyError:
             self._image_object = None
 
+    def _normalize_image_object(self, image):
+        """
+        Build a copy of the image object with full URLs.
+
+        Normalized URLs are cached by input URLs, protocol and URL builder (see :py:meth:`get_url_builder`).
+
+        :param image: image object
+        :return: normalized image object
+        """
+        url = image.get("url", None)
+        secure_url = image.get("secure_url", None)
+        protocol = self.get_protocol()
+        cls = type(self)
+        key = None
+        if cls._normalize_media_url is BaseMeta._normalize_media_url and cls.get_full_url is BaseMeta.get_full_url:
+            if url and url.startswith("http") and (secure_url is None or secure_url.startswith("http")):
+                context = None
+            else:
+                context = self._get_url_cache_key()
+            key = (url, secure_url, protocol, get_config().image_url, context)
+        try:
+            url, secure_url = _image_urls[key]
+        except KeyError:
+            url = self._normalize_media_url(url)
+            if protocol == "https":
+                secure_url = self._normalize_media_url(secure_url or url)
+                if secure_url.startswith("http://"):
+                    secure_url = secure_url.replace("http://", "https://")
+            else:
+                secure_url = None
+            if key is not None:
+                if len(_image_urls) >= IMAGE_URLS_CACHE_SIZE:
+                    _image_urls.clear()
+                _image_urls[key] = url, secure_url
+        image = dict(image, url=url)
+        if secure_url is not None:
+            image["secure_url"] = secure_url
+        return image
+
+    def _get_url_cache_key(self):
+        """
+        Key identifying the URLs built by :py:meth:`get_full_url`
+        """
+        if self.request is not None:
+            try:
+                return get_url_builder(self.request).cache_key
+            except AttributeError:
+                pass
+        return self.get_url_builder().cache_key
+
     @property
     def schema(self):
         """
@@ -228,56 +418,319 @@ class Meta(FullUrlMixin):
         * dates as isoformat
         * iterables and dicts are processed depth-first to process their items
 
+        Values are converted by the functions registered with :py:func:`meta.schema.register_schema_handler`,
+        using :py:class:`meta.schema.SchemaBuilder`.
+
         If no type is set :py:attr:`~meta.views.Meta.schemaorg_type` is used
 
+        Schema is built on first access and reused until a new schema is set.
+
         :return: dict
         """
-        from meta.models import ModelMeta
+        if self._schema_data is not None:
+            return self._schema_data
+
+        with schema_scope() as memo:
+            schema = self._get_schema_builder(memo).build(
+                self._schema, self._get_object_key(), partial(getattr, self, "schemaorg_type")
+            )
+        self._schema_data = schema
+        return schema
 
-        def process_item(item):
-            if isinstance(item, Meta):
-                return item.schema
-            if isinstance(item, ModelMeta):
-                # if not cached, object schema is generated and put into local cache
-                if item._local_key not in visited:
-                    visited[item._local_key] = item.as_meta(self.request).schema
-                return visited[item._local_key]
-            elif isinstance(item, date):
-                return item.isoformat()
-            elif isinstance(item, list) or isinstance(item, tuple):
-                return [process_item(value) for value in item]
-            elif isinstance(item, dict):
-                return {itemkey: process_item(itemvalue) for itemkey, itemvalue in item.items()}
-            return item
-
-        schema = {}
-        # object is immediately set here to recursion
-        # if we are visiting parent -> child relation, we don't need the pointer
-        # back up
-        if isinstance(self._obj, ModelMeta):
-            visited[self._obj._local_key] = None
-        for key, val in self._schema.items():
-            schema[key] = process_item(val)
-        if "@type" not in schema:
-            schema["@type"] = self.schemaorg_type
-        # after generating the full schema, we can save it in the local cache for future uses
-        if isinstance(self._obj, ModelMeta):
-            visited[self._obj._local_key] = schema
+    async def aschema(self):
+        """
+        Asynchronous version of :py:attr:`schema`.
+
+        Schemas of nested :py:class:`~meta.models.ModelMeta` objects are resolved with their asynchronous
+        providers, with the same limits (see :py:meth:`meta.schema.SchemaBuilder.arun`).
+
+        :return: dict
+        """
+        if self._schema_data is not None:
+            return self._schema_data
+
+        with schema_scope() as memo:
+            schema = await self._get_schema_builder(memo).abuild(
+                self._schema, self._get_object_key(), partial(getattr, self, "schemaorg_type")
+            )
+        self._schema_data = schema
         return schema
 
+    def _get_object_key(self):
+        """
+        Key of the linked :py:class:`~meta.models.ModelMeta` object, used to store its schema
+
+        :return: object key, ``None`` if Meta is not generated from a ModelMeta object
+        """
+        from meta.models import ModelMeta
+
+        return self._obj._local_key if isinstance(self._obj, ModelMeta) else None
+
+    def _get_schema_builder(self, memo):
+        """
+        Create the object building the schema
+
+        :param memo: current :py:class:`~meta.utils.SchemaMemo`
+        :return: :py:class:`~meta.schema.SchemaBuilder` instance
+        """
+        context = None
+        if get_config().schema_cache_size:
+            context = get_cache_context(self.request)
+        return SchemaBuilder(memo, context, self.request)
+
     @schema.setter
     def schema(self, schema):
         self._schema = schema
+        self._schema_data = None
 
     def as_json_ld(self):
         """
         Convert the schema to json-ld
 
+        If the schema has not been built yet, dates and nested objects are converted while serializing, without
+        building the processed :py:attr:`schema`. Serialization is performed by :ref:`META_JSON_LD_ENCODER`.
+        Nested :py:class:`~meta.models.ModelMeta` objects are serialized separately and their JSON is included
+        as it is, so that it can be reused by other objects (see :ref:`schema.cache`).
+
+        If :ref:`META_JSON_LD_GRAPH` is set, a ``@graph`` is generated instead (see
+        :py:class:`~meta.graph.JsonLdGraph`).
+
         :return: json
         """
-        data = self.schema
-        data["@context"] = "http://schema.org"
-        return json.dumps(data)
+        from meta.graph import JsonLdGraph
+        from meta.models import ModelMeta
+
+        if get_config().json_ld_graph:
+            graph = JsonLdGraph(self.request)
+            graph.add(self)
+            return graph.as_json_ld()
+        encoder = get_json_ld_encoder()
+        if self._schema_data is not None:
+            data = dict(self._schema_data)
+            data["@context"] = "http://schema.org"
+            return encode_json_ld(data, encoder)
+        with schema_scope() as memo:
+            builder = self._get_schema_builder(memo)
+            fragments = []
+            placeholder = "__django_meta_{}_".format(uuid4().hex)
+
+            omitted = "{}omitted".format(placeholder)
+
+            def default(item):
+                if isinstance(item, ModelMeta):
+                    # nested objects are serialized once and spliced in the output as they are
+                    value = _get_object_fragment(item, builder, encoder)
+                    if value is not None and value is not OMITTED:
+                        fragments.append(value)
+                        return "{}{}".format(placeholder, len(fragments) - 1)
+                elif get_schema_handler(type(item)) is not None:
+                    value = builder.convert(item)
+                else:
+                    raise TypeError("Object of type {} is not JSON serializable".format(type(item).__name__))
+                return omitted if value is OMITTED else value
+
+            data = dict(self._schema)
+            if "@type" not in data:
+                data["@type"] = self.schemaorg_type
+            data["@context"] = "http://schema.org"
+            builder.open_object(self._get_object_key())
+            try:
+                json_ld = encode_json_ld(data, encoder, default=default)
+            finally:
+                builder.close_object()
+        if fragments:
+            json_ld = re.sub('"{}([0-9]+)"'.format(placeholder), lambda match: fragments[int(match.group(1))], json_ld)
+        if omitted in json_ld:
+            json_ld = _remove_omitted(json_ld, '"{}"'.format(omitted))
+        return json_ld
+
+
+@register_schema_handler(BaseMeta)
+def _build_meta_schema(builder, item, depth):
+    """
+    Build the schema of a :py:class:`BaseMeta` object included in another object schema
+    """
+    if item._schema_data is not None:
+        key = item._get_object_key()
+        if key:
+            builder.depend(key, builder.memo.dependencies.get(key, ()))
+        return item._schema_data
+    if not builder.can_enter(depth + 1):
+        return builder.omit()
+    return builder.enter(
+        item._schema,
+        item._get_object_key(),
+        partial(getattr, item, "schemaorg_type"),
+        depth + 1,
+        partial(setattr, item, "_schema_data"),
+    )
+
+
+class Meta(BaseMeta):
+    """
+    Helper for building context meta object
+    """
+
+    def __init__(self, **kwargs):
+        self.request = kwargs.get("request", None)
+        config = get_config()
+        self.use_sites = kwargs.get("use_sites", config.use_sites)
+        self.title = kwargs.get("title")
+        self.og_title = kwargs.get("og_title")
+        self.twitter_title = kwargs.get("twitter_title")
+        self.schemaorg_title = kwargs.get("schemaorg_title")
+        self.schemaorg_description = kwargs.get("schemaorg_description")
+        self.description = kwargs.get("description")
+        self.extra_props = kwargs.get("extra_props")
+        self.extra_custom_props = kwargs.get("extra_custom_props")
+        self.custom_namespace = kwargs.get("custom_namespace", config.og_namespaces)
+        self.keywords = kwargs.get("keywords")
+        self.url = kwargs.get("url")
+        self.image = kwargs.get("image")
+        self.image_object = kwargs.get("image_object")
+        self.image_width = kwargs.get("image_width")
+        self.image_height = kwargs.get("image_height")
+        self.object_type = kwargs.get("object_type", config.site_type)
+        self.site_name = kwargs.get("site_name", config.site_name)
+        self.twitter_site = kwargs.get("twitter_site")
+        self.twitter_creator = kwargs.get("twitter_creator")
+        self.twitter_type = kwargs.get("twitter_type", kwargs.get("twitter_card", config.twitter_type))
+        self.twitter_card = self.twitter_type
+        self.facebook_app_id = kwargs.get("facebook_app_id")
+        self.locale = kwargs.get("locale")
+        self.use_og = kwargs.get("use_og", config.use_og_properties)
+        self.use_twitter = kwargs.get("use_twitter", config.use_twitter_properties)
+        self.use_facebook = kwargs.get("use_facebook", config.use_facebook_properties)
+        self.use_schemaorg = kwargs.get("use_schemaorg", config.use_schemaorg_properties)
+        self.use_json_ld = kwargs.get("use_json_ld", config.use_json_ld_schema)
+        self.use_title_tag = kwargs.get("use_title_tag", config.use_title_tag)
+        self.schemaorg_type = kwargs.get("schemaorg_type", config.schemaorg_type)
+        self.fb_pages = kwargs.get("fb_pages", config.fb_pages)
+        self.og_app_id = kwargs.get("og_app_id", config.fb_appid)
+        self._schema = kwargs.get("schema", {})
+        self._obj = kwargs.get("obj", {})
+
+
+META_DEFAULTS = {
+    "use_sites": "use_sites",
+    "custom_namespace": "og_namespaces",
+    "object_type": "site_type",
+    "site_name": "site_name",
+    "twitter_type": "twitter_type",
+    "twitter_card": "twitter_type",
+    "use_og": "use_og_properties",
+    "use_twitter": "use_twitter_properties",
+    "use_facebook": "use_facebook_properties",
+    "use_schemaorg": "use_schemaorg_properties",
+    "use_json_ld": "use_json_ld_schema",
+    "use_title_tag": "use_title_tag",
+    "schemaorg_type": "schemaorg_type",
+    "fb_pages": "fb_pages",
+    "og_app_id": "fb_appid",
+}
+"""
+Meta fields whose default value is provided by a setting, with the corresponding
+:py:class:`~meta.settings.MetaConfig` attribute
+"""
+
+
+class CompactMeta(BaseMeta):
+    """
+    Memory efficient version of :py:class:`Meta`, with the same interface.
+
+    Fields are stored in slots and only the ones passed to the constructor are set on the instance: the other
+    ones are read from the current settings (see :py:data:`META_DEFAULTS`) or default to ``None``.
+
+    Fields not known in advance (e.g.: custom ones set by :py:class:`~meta.models.ModelMeta`) are stored
+    in the instance dictionary, which is only created if needed.
+    """
+
+    _fields = (
+        "title",
+        "og_title",
+        "twitter_title",
+        "schemaorg_title",
+        "schemaorg_description",
+        "description",
+        "extra_props",
+        "extra_custom_props",
+        "image_width",
+        "image_height",
+        "twitter_site",
+        "twitter_creator",
+        "facebook_app_id",
+        "locale",
+    ) + tuple(META_DEFAULTS)
+
+    __slots__ = _fields + (
+        "request",
+        "_keywords",
+        "_url",
+        "_image",
+        "_image_object",
+        "_schema",
+        "_schema_data",
+        "_obj",
+        "_domain",
+        "_url_builder",
+        "__dict__",
+    )
+
+    def __init__(self, **kwargs):
+        self.request = kwargs.get("request", None)
+        for field in self._fields:
+            if field in kwargs:
+                setattr(self, field, kwargs[field])
+        if "twitter_type" in kwargs or "twitter_card" in kwargs:
+            self.twitter_type = self.twitter_card = kwargs.get("twitter_type", kwargs.get("twitter_card"))
+        self._schema_data = None
+        self.keywords = kwargs.get("keywords")
+        self.url = kwargs.get("url")
+        self.image = kwargs.get("image")
+        self.image_object = kwargs.get("image_object")
+        self._schema = kwargs.get("schema", {})
+        self._obj = kwargs.get("obj", {})
+
+    def __getattr__(self, name):
+        # only called for fields not set on the instance
+        try:
+            return getattr(get_config(), META_DEFAULTS[name])
+        except KeyError:
+            pass
+        if name in self.__slots__:
+            return None
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+
+class LazyMeta(Meta):
+    """
+    :py:class:`Meta` object whose fields are resolved on first access and then stored.
+
+    Returned by :py:meth:`meta.models.ModelMeta.as_meta` in lazy mode.
+    """
+
+    _pending = {}
+    """
+    Fields not resolved yet: dictionary of field name / callable returning the field value
+    """
+
+    _pending_aliases = {"_schema": "schema", "_schema_data": "schema"}
+    """
+    Attributes storing the fields values, read directly (e.g.: by :py:meth:`Meta.as_json_ld`)
+    """
+
+    def __getattribute__(self, name):
+        pending = object.__getattribute__(self, "_pending")
+        if pending:
+            field = object.__getattribute__(self, "_pending_aliases").get(name, name)
+            if field in pending:
+                setattr(self, field, pending.pop(field)())
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if name in self._pending:
+            del self._pending[name]
+        super().__setattr__(name, value)
 
 
 class MetadataMixin(FullUrlMixin):
@@ -315,19 +768,20 @@ class MetadataMixin(FullUrlMixin):
     schema = {}
 
     def __init__(self, **kwargs):
-        self.use_sites = get_setting("USE_SITES")
-        self.use_og = get_setting("USE_OG_PROPERTIES")
-        self.use_title_tag = get_setting("USE_TITLE_TAG")
+        config = get_config()
+        self.use_sites = config.use_sites
+        self.use_og = config.use_og_properties
+        self.use_title_tag = config.use_title_tag
         super().__init__(**kwargs)
 
     def get_meta_class(self):
         return self.meta_class
 
     def get_protocol(self):
-        return get_setting("SITE_PROTOCOL")
+        return get_config().site_protocol
 
     def get_domain(self):
-        return get_setting("SITE_DOMAIN")
+        return get_config().site_domain
 
     def get_meta_title(self, context=None):
         return self.title
@@ -362,10 +816,10 @@ class MetadataMixin(FullUrlMixin):
         return self.image_object
 
     def get_meta_object_type(self, context=None):
-        return self.object_type or get_setting("SITE_TYPE")
+        return self.object_type or get_config().site_type
 
     def get_meta_site_name(self, context=None):
-        return self.site_name or get_setting("SITE_NAME")
+        return self.site_name or get_config().site_name
 
     def get_meta_extra_props(self, context=None):
         return self.extra_props
@@ -374,7 +828,7 @@ class MetadataMixin(FullUrlMixin):
         return self.extra_custom_props
 
     def get_meta_custom_namespace(self, context=None):
-        return self.custom_namespace or get_setting("OG_NAMESPACES")
+        return self.custom_namespace or get_config().og_namespaces
 
     def get_meta_twitter_site(self, context=None):
         return self.twitter_site
@@ -435,33 +889,49 @@ class MetadataMixin(FullUrlMixin):
         """
         raise NotImplementedError
 
+    def get_meta_outputs(self):
+        """
+        Outputs enabled for the view, as the set of ``use_*`` flags (see :py:data:`OUTPUT_FLAGS`) set to ``True``
+
+        :return: frozenset
+        """
+        config = get_config()
+        flags = {"use_og": self.use_og, "use_title_tag": self.use_title_tag}
+        return frozenset(
+            flag
+            for flag, setting in OUTPUT_FLAGS.items()
+            if (flags[flag] if flag in flags else getattr(config, setting))
+        )
+
     def get_meta(self, context=None):
+        providers = {
+            "title": self.get_meta_title,
+            "og_title": self.get_meta_og_title,
+            "twitter_title": self.get_meta_twitter_title,
+            "schemaorg_title": self.get_meta_schemaorg_title,
+            "schemaorg_description": self.get_meta_schemaorg_description,
+            "description": self.get_meta_description,
+            "extra_props": self.get_meta_extra_props,
+            "extra_custom_props": self.get_meta_extra_custom_props,
+            "custom_namespace": self.get_meta_custom_namespace,
+            "keywords": self.get_meta_keywords,
+            "image": self.get_meta_image,
+            "image_object": self.get_meta_image_object,
+            "url": self.get_meta_url,
+            "object_type": self.get_meta_object_type,
+            "site_name": self.get_meta_site_name,
+            "twitter_site": self.get_meta_twitter_site,
+            "twitter_creator": self.get_meta_twitter_creator,
+            "twitter_type": self.get_meta_twitter_type,
+            "locale": self.get_meta_locale,
+            "facebook_app_id": self.get_meta_facebook_app_id,
+            "schemaorg_type": self.get_meta_schemaorg_type,
+            "schema": self.get_schema,
+        }
+        pruned = get_pruned_fields(self.get_meta_outputs()) if get_config().prune_fields else ()
+        kwargs = {field: provider(context=context) for field, provider in providers.items() if field not in pruned}
         return self.get_meta_class()(
-            use_og=self.use_og,
-            use_title_tag=self.use_title_tag,
-            use_sites=self.use_sites,
-            title=self.get_meta_title(context=context),
-            og_title=self.get_meta_og_title(context=context),
-            twitter_title=self.get_meta_twitter_title(context=context),
-            schemaorg_title=self.get_meta_schemaorg_title(context=context),
-            schemaorg_description=self.get_meta_schemaorg_description(context=context),
-            description=self.get_meta_description(context=context),
-            extra_props=self.get_meta_extra_props(context=context),
-            extra_custom_props=self.get_meta_extra_custom_props(context=context),
-            custom_namespace=self.get_meta_custom_namespace(context=context),
-            keywords=self.get_meta_keywords(context=context),
-            image=self.get_meta_image(context=context),
-            image_object=self.get_meta_image_object(context=context),
-            url=self.get_meta_url(context=context),
-            object_type=self.get_meta_object_type(context=context),
-            site_name=self.get_meta_site_name(context=context),
-            twitter_site=self.get_meta_twitter_site(context=context),
-            twitter_creator=self.get_meta_twitter_creator(context=context),
-            twitter_type=self.get_meta_twitter_type(context=context),
-            locale=self.get_meta_locale(context=context),
-            facebook_app_id=self.get_meta_facebook_app_id(context=context),
-            schemaorg_type=self.get_meta_schemaorg_type(context=context),
-            schema=self.get_schema(context=context),
+            use_og=self.use_og, use_title_tag=self.use_title_tag, use_sites=self.use_sites, **kwargs
         )
 
     def get_context_data(self, **kwargs):
@@ -3,7 +3,7 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from meta.models import ModelMeta
+from meta.models import MetaManager, ModelMeta
 from meta.views import Meta
 
 try:
@@ -76,6 +76,8 @@ class Post(ModelMeta, models.Model):
     )
     related_posts = models.ManyToManyField("example_app.Post", verbose_name=_("related posts"), blank=True)
 
+    objects = MetaManager()
+
     _metadata_default = ModelMeta._metadata_default.copy()  # purely for testing purposes
     _metadata_default["locale"] = "dummy_locale"
 
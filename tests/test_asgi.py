@@ -1,11 +1,14 @@
+import asyncio
 from datetime import timedelta
+from unittest.mock import patch
 
 import django
 import pytest
 from django.utils.text import slugify
 from django.utils.timezone import now
 
-from tests.example_app.models import Post
+from meta.models import _plans
+from tests.example_app.models import Comment, Post
 
 try:
     from asgiref.sync import sync_to_async
@@ -38,6 +41,16 @@ def get_post(title):
     return post
 
 
+@sync_to_async
+def add_comment(post, body):
+    return Comment.objects.create(post=post, body=body)
+
+
+@sync_to_async
+def refresh(post):
+    return Post.objects.get(pk=post.pk)
+
+
 @sync_to_async
 def delete_post(post):
     post.delete()
@@ -69,3 +82,46 @@ async def test_mixin_on_asgi_request():
         meta = await get_meta(post, request)
         assert meta.title == "first post"
         assert meta.og_title == "og first post"
+
+
+@minversion
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_aas_meta():
+    with override_settings(META_USE_SITES=True, META_SITE_PROTOCOL="http", META_USE_OG_PROPERTIES=True):
+        post = await get_post("async post")
+        await add_comment(post, "comment body")
+        meta = await post.aas_meta()
+        assert meta.title == "async post"
+        assert meta.og_title == "og async post"
+        assert meta.url == "http://example.com/async-post/"
+        assert meta._schema_data["comment"] == [{"@type": "Comment", "text": "comment body"}]
+        assert meta._schema_data["commentCount"] == 1
+        sync_meta = await get_meta(await refresh(post))
+        assert meta.keywords == sync_meta.keywords
+        assert meta.schema == await sync_to_async(lambda: sync_meta.schema)()
+
+
+@minversion
+@pytest.mark.asyncio
+@pytest.mark.django_db
+async def test_aas_meta_async_provider():
+    async def aget_description(self):
+        await asyncio.sleep(0)
+        return "async description"
+
+    metadata = dict(Post._metadata, description="aget_description")
+    with override_settings(META_USE_SITES=True, META_SITE_PROTOCOL="http"):
+        post = await get_post("async post")
+        with patch.object(Post, "aget_description", aget_description, create=True), patch.object(
+            Post, "_metadata", metadata
+        ):
+            _plans.clear()
+            try:
+                meta = await post.aas_meta()
+                assert meta.description == "async description"
+                assert meta.og_description == "post meta"
+                sync_meta = await get_meta(await refresh(post))
+                assert sync_meta.description == "async description"
+            finally:
+                _plans.clear()
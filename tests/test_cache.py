@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from app_helper.base_test import BaseTestCase
+from asgiref.sync import async_to_sync
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from meta.cache import get_cache_key, get_cached_meta
+
+from .example_app.models import Comment, Post, Publisher
+
+
+@override_settings(META_USE_CACHE=True, META_SITE_PROTOCOL="http", META_USE_SITES=True)
+class TestMetaCache(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.publisher = Publisher.objects.create(name="publisher name")
+        cls.post = Post.objects.create(
+            title="a title",
+            slug="title",
+            abstract="post abstract",
+            meta_description="post meta",
+            meta_keywords="post keyword1,post keyword 2",
+            author=cls.user,
+            publisher=cls.publisher,
+        )
+        cls.related_post = Post.objects.create(title="related title", slug="related-title", author=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        Site.objects.get_current()
+
+    def get_post(self):
+        return Post.objects.get(pk=self.post.pk)
+
+    def test_cache_hit(self):
+        meta = self.get_post().as_meta()
+        post = self.get_post()
+        with self.assertNumQueries(0):
+            cached = post.as_meta()
+            self.assertEqual(cached.title, meta.title)
+            self.assertEqual(cached.og_title, "a title")
+            self.assertEqual(cached.url, "http://example.com/title/")
+            self.assertEqual(cached.keywords, ["post keyword1", "post keyword 2"])
+            self.assertEqual(cached.schema, meta.schema)
+
+    def test_cache_key(self):
+        request = self.get_request(None, "en", path="/title/", secure=True)
+        self.assertNotEqual(get_cache_key(self.post), get_cache_key(self.post, request))
+        self.assertEqual(get_cached_meta(self.post, request)[0], None)
+        self.get_post().as_meta(request)
+        self.assertTrue(get_cached_meta(self.post, request)[0])
+        self.assertEqual(get_cached_meta(self.post)[0], None)
+
+    def test_invalidate_on_save(self):
+        self.get_post().as_meta()
+        post = self.get_post()
+        post.title = "new title"
+        post.save()
+        meta = self.get_post().as_meta()
+        self.assertEqual(meta.title, "new title")
+        self.assertEqual(meta.schema["name"], "new title")
+
+    def test_invalidate_on_related_save(self):
+        self.assertEqual(self.get_post().as_meta().schema["comment"], [])
+        Comment.objects.create(body="comment body", post=self.post)
+        self.assertEqual(self.get_post().as_meta().schema["comment"], [{"@type": "Comment", "text": "comment body"}])
+
+    def test_invalidate_on_included_save(self):
+        self.assertEqual(self.get_post().as_meta().schema["publisher"]["name"], "publisher name")
+        publisher = Publisher.objects.get(pk=self.publisher.pk)
+        publisher.name = "new name"
+        publisher.save()
+        self.assertEqual(get_cached_meta(self.post)[0], None)
+        self.assertEqual(self.get_post().as_meta().schema["publisher"]["name"], "new name")
+
+    def test_invalidate_on_included_save_async(self):
+        meta = async_to_sync(self.get_post().aas_meta)()
+        self.assertEqual(meta.schema["publisher"]["name"], "publisher name")
+        publisher = Publisher.objects.get(pk=self.publisher.pk)
+        publisher.name = "new name"
+        publisher.save()
+        self.assertEqual(self.get_post().as_meta().schema["publisher"]["name"], "new name")
+
+    def test_invalidate_on_m2m_changed(self):
+        self.assertEqual(self.get_post().as_meta().schema["citation"], [])
+        self.related_post.as_meta()
+        self.post.related_posts.add(self.related_post)
+        self.assertEqual(get_cached_meta(self.related_post)[0], None)
+        self.assertEqual(self.get_post().as_meta().schema["citation"][0]["name"], "related title")
+
+    def test_as_meta_many(self):
+        Post.objects.get(pk=self.related_post.pk).as_meta()
+        posts = list(Post.objects.defer("title", "og_title").filter(pk__in=[self.post.pk, self.related_post.pk]))
+        refresh = Post.refresh_from_db
+        with patch.object(Post, "refresh_from_db", autospec=True, side_effect=refresh) as refresh_from_db:
+            with self.assertLogs("meta.models", "WARNING") as logs:
+                metas = Post.as_meta_many(posts)
+            refresh_from_db.assert_not_called()
+        # deferred fields are loaded in one query, only for the object missing from the cache
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("og_title, title of 1 example_app.Post objects", logs.output[0])
+        self.assertEqual({meta.title for meta in metas}, {"a title", "related title"})
+        posts = list(Post.objects.filter(pk__in=[self.post.pk, self.related_post.pk]))
+        with self.assertNumQueries(0):
+            metas = Post.as_meta_many(posts)
+        self.assertEqual({meta.title for meta in metas}, {"a title", "related title"})
+
+    def test_cache_disabled(self):
+        with override_settings(META_USE_CACHE=False):
+            self.get_post().as_meta()
+            self.assertEqual(get_cached_meta(self.post)[0], None)
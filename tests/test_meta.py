@@ -1,11 +1,22 @@
 import json
+import tracemalloc
 from copy import copy
+from dataclasses import FrozenInstanceError, fields
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
 
+from asgiref.sync import async_to_sync
 from django.contrib.sites.models import Site
 from django.core.exceptions import ImproperlyConfigured
+from django.template import Context, Template
 from django.test import RequestFactory, TestCase, modify_settings, override_settings
 
-from meta.views import Meta
+from meta.graph import JsonLdGraph
+from meta.schema import _class_handlers, _handlers, get_schema_handler, register_schema_handler
+from meta.settings import MetaConfig, get_config, get_setting, params
+from meta.utils import UrlBuilder, get_url_builder
+from meta.views import BaseMeta, CompactMeta, FullUrlMixin, Meta, _image_urls
 
 
 @override_settings(
@@ -267,6 +278,19 @@ class MetaObjectTestCase(TestCase):
             json.dumps(data),
         )
 
+    def test_schema_memoized(self):
+        m = Meta(schema={"foo": "bar", "logo": Meta(schema={"@type": "ImageObject"})})
+        schema = m.schema
+        self.assertIs(m.schema, schema)
+        self.assertEqual(schema["logo"], {"@type": "ImageObject"})
+        m.schema = {"foo": "baz"}
+        self.assertEqual(m.schema, {"foo": "baz", "@type": m.schemaorg_type})
+
+    def test_as_json_ld_no_side_effects(self):
+        m = Meta(schema={"foo": "bar"})
+        self.assertEqual(json.loads(m.as_json_ld())["@context"], "http://schema.org")
+        self.assertNotIn("@context", m.schema)
+
     @override_settings(META_SITE_DOMAIN="example-no-sites.com", META_SITE_PROTOCOL="http")
     @modify_settings(INSTALLED_APPS={"remove": "django.contrib.sites"})
     def test_get_full_url_without_sites(self):
@@ -283,3 +307,279 @@ class MetaObjectTestCase(TestCase):
         m = Meta()
         with self.assertRaises(ImproperlyConfigured):
             self.assertEqual(m.get_full_url("foo/bar"), "http://example-no-sites.com/foo/bar")
+
+
+class MetaConfigTestCase(TestCase):
+    def test_fields(self):
+        self.assertEqual({field.name for field in fields(MetaConfig)}, {name[5:].lower() for name in params})
+
+    def test_snapshot(self):
+        config = get_config()
+        self.assertIs(get_config(), config)
+        with self.assertRaises(FrozenInstanceError):
+            config.use_og_properties = True
+        with override_settings(META_USE_OG_PROPERTIES=not config.use_og_properties, META_TWITTER_TYPE="photo"):
+            self.assertIsNot(get_config(), config)
+            self.assertEqual(get_config().use_og_properties, not config.use_og_properties)
+            self.assertEqual(get_config().twitter_type, "photo")
+            self.assertEqual(get_setting("TWITTER_TYPE"), "photo")
+            self.assertEqual(Meta().twitter_type, "photo")
+        self.assertEqual(get_config(), config)
+
+
+@override_settings(
+    META_SITE_PROTOCOL="https",
+    META_SITE_DOMAIN="example.com",
+    META_USE_SITES=False,
+    META_USE_OG_PROPERTIES=True,
+    META_FB_APPID="appid",
+)
+class CompactMetaTestCase(TestCase):
+    fields = (
+        "title",
+        "og_title",
+        "description",
+        "keywords",
+        "url",
+        "image",
+        "image_object",
+        "image_width",
+        "object_type",
+        "site_name",
+        "twitter_type",
+        "twitter_card",
+        "custom_namespace",
+        "use_og",
+        "use_twitter",
+        "use_sites",
+        "og_app_id",
+        "fb_pages",
+        "schemaorg_type",
+        "schema",
+    )
+
+    def test_same_interface(self):
+        for kwargs in (
+            {},
+            {
+                "title": "title",
+                "description": "description",
+                "keywords": ["foo", "bar"],
+                "url": "/some/path",
+                "image": "img/foo.png",
+                "twitter_card": "photo",
+                "use_og": False,
+                "schema": {"@type": "Article", "name": "title"},
+            },
+        ):
+            meta = Meta(**kwargs)
+            compact_meta = CompactMeta(**kwargs)
+            for field in self.fields:
+                self.assertEqual(getattr(compact_meta, field), getattr(meta, field), field)
+
+    def test_attributes(self):
+        meta = CompactMeta()
+        self.assertFalse(hasattr(meta, "__dict__") and meta.__dict__)
+        with override_settings(META_TWITTER_TYPE="photo"):
+            self.assertEqual(meta.twitter_type, "photo")
+        meta.twitter_type = "summary"
+        self.assertEqual(meta.twitter_type, "summary")
+        meta.custom_field = "custom"
+        self.assertEqual(meta.custom_field, "custom")
+        self.assertEqual(meta.__dict__, {"custom_field": "custom"})
+        with self.assertRaises(AttributeError):
+            meta.missing_field
+
+    def test_memory(self):
+        def measure(meta_class):
+            tracemalloc.start()
+            objects = [meta_class(title="title", description="description", url="/path") for __ in range(500)]
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return size / len(objects)
+
+        meta_size = measure(Meta)
+        compact_size = measure(CompactMeta)
+        self.assertLess(compact_size, meta_size * 0.75)
+
+
+class UrlBuilderTestCase(TestCase):
+    def test_request_builder(self):
+        request = RequestFactory().get("/some/page/", secure=True)
+        builder = get_url_builder(request)
+        self.assertIs(get_url_builder(request), builder)
+        for url in (
+            None,
+            "",
+            "/path/file.png",
+            "/path/?q=1&b=2#anchor",
+            "//cdn.example.com/file.png",
+            "relative/file.png",
+            "/path/../file.png",
+            "/path with spaces/",
+            "/pàth/",
+            "http://example.com/file.png",
+        ):
+            self.assertEqual(builder.build(url), request.build_absolute_uri(url), url)
+
+    def test_domain_builder(self):
+        builder = UrlBuilder("https", "example.com")
+        self.assertEqual(builder.build(None), None)
+        self.assertEqual(builder.build("/path"), "https://example.com/path")
+        self.assertEqual(builder.build("path"), "https://example.com/path")
+        self.assertEqual(builder.build("//cdn.example.com/path"), "https://cdn.example.com/path")
+        self.assertEqual(builder.build("http://other.com/path"), "http://other.com/path")
+        builder = UrlBuilder("https", "http://example.com")
+        self.assertEqual(builder.build("/path"), "http://example.com/path")
+        self.assertEqual(builder.build("//cdn.example.com/path"), "//cdn.example.com/path")
+
+    @override_settings(META_SITE_PROTOCOL="https", META_USE_SITES=True)
+    def test_domain_computed_once(self):
+        with patch.object(FullUrlMixin, "get_domain", autospec=True, return_value="example.com") as get_domain:
+            meta = Meta(url="/path", image="/image.png", image_object={"url": "/image.png"})
+            self.assertEqual(meta.url, "https://example.com/path")
+            self.assertEqual(meta.image, "https://example.com/image.png")
+            self.assertEqual(meta.image_object["secure_url"], "https://example.com/image.png")
+            self.assertEqual(meta.domain, "example.com")
+            self.assertEqual(meta.get_domain(), "example.com")
+        get_domain.assert_called_once_with(meta)
+
+    def test_template_get_domain(self):
+        class DuckMeta:
+            use_twitter = True
+
+            def get_domain(self):
+                return "duck.example.com"
+
+        output = Template('{% include "meta/meta.html" %}').render(Context({"meta": DuckMeta()}))
+        self.assertIn('<meta name="twitter:domain" content="duck.example.com">', output)
+
+
+@override_settings(META_SITE_PROTOCOL="https", META_SITE_DOMAIN="example.com", META_USE_SITES=False)
+class ImageObjectTestCase(TestCase):
+    image_object = {"url": "images/foo.gif", "width": 100}
+
+    def setUp(self):
+        super().setUp()
+        _image_urls.clear()
+
+    def test_copy(self):
+        meta = Meta(image_object=self.image_object)
+        self.assertEqual(
+            meta.image_object,
+            {
+                "url": "https://example.com/static/images/foo.gif",
+                "secure_url": "https://example.com/static/images/foo.gif",
+                "width": 100,
+            },
+        )
+        self.assertEqual(self.image_object, {"url": "images/foo.gif", "width": 100})
+
+    def test_cached(self):
+        normalize = BaseMeta._normalize_media_url
+        with patch.object(BaseMeta, "_normalize_media_url", autospec=True, side_effect=normalize) as normalize_url:
+            first = Meta(image_object=self.image_object).image_object
+            self.assertEqual(normalize_url.call_count, 2)
+            second = CompactMeta(image_object=self.image_object).image_object
+            self.assertEqual(normalize_url.call_count, 2)
+            self.assertEqual(first, second)
+            self.assertIsNot(first, second)
+            with override_settings(META_SITE_PROTOCOL="http"):
+                self.assertEqual(
+                    Meta(image_object=self.image_object).image_object["url"],
+                    "http://example.com/static/images/foo.gif",
+                )
+            with override_settings(META_SITE_DOMAIN="other.example.com"):
+                self.assertEqual(
+                    Meta(image_object=self.image_object).image_object["url"],
+                    "https://other.example.com/static/images/foo.gif",
+                )
+            request = RequestFactory().get("/page/")
+            self.assertEqual(
+                Meta(request=request, image_object={"url": "/foo.gif"}).image_object["url"],
+                "http://testserver/foo.gif",
+            )
+
+
+class SchemaBuilderTestCase(TestCase):
+    def get_chain(self, length):
+        meta = Meta(schema={"@type": "Thing", "name": "0"})
+        for index in range(1, length):
+            meta = Meta(schema={"@type": "Thing", "name": str(index), "about": [{"item": meta}]})
+        return meta
+
+    def assert_chain_depth(self, schema, length):
+        depth = 0
+        while "about" in schema:
+            schema = schema["about"][0]["item"]
+            depth += 1
+        self.assertEqual(depth, length - 1)
+        self.assertEqual(schema, {"@type": "Thing", "name": "0"})
+
+    @override_settings(META_SCHEMA_MAX_DEPTH=None, META_SCHEMA_MAX_ENTITIES=None)
+    def test_deep_schema(self):
+        self.assert_chain_depth(self.get_chain(5000).schema, 5000)
+
+    @override_settings(META_SCHEMA_MAX_DEPTH=None, META_SCHEMA_MAX_ENTITIES=None)
+    def test_deep_schema_async(self):
+        self.assert_chain_depth(async_to_sync(self.get_chain(5000).aschema)(), 5000)
+
+    @override_settings(META_SCHEMA_MAX_DEPTH=None, META_SCHEMA_MAX_ENTITIES=None)
+    def test_deep_graph(self):
+        graph = JsonLdGraph()
+        graph.add(self.get_chain(5000))
+        nodes = graph.as_dict()["@graph"]
+        self.assertEqual(len(nodes), 1)
+        self.assert_chain_depth(nodes[0], 5000)
+
+    def test_max_depth(self):
+        with override_settings(META_SCHEMA_MAX_DEPTH=2):
+            schema = self.get_chain(5).schema
+        self.assertEqual(schema["name"], "4")
+        self.assertEqual(schema["about"][0]["item"]["about"][0]["item"]["about"], [{"item": None}])
+
+    @override_settings(META_SCHEMA_MAX_DEPTH=2, META_SCHEMA_MAX_ENTITIES=4)
+    def test_limits_async_graph(self):
+        schema = self.get_chain(5).schema
+        self.assertEqual(async_to_sync(self.get_chain(5).aschema)(), schema)
+        graph = JsonLdGraph()
+        graph.add(self.get_chain(5))
+        self.assertEqual(graph.as_dict()["@graph"], [schema])
+        meta = Meta(schema={"items": [Meta(schema={"name": str(index)}) for index in range(5)]})
+        items = async_to_sync(meta.aschema)()["items"]
+        self.assertEqual([item["name"] for item in items], ["0", "1", "2"])
+
+    def test_max_entities(self):
+        meta = Meta(schema={"items": [Meta(schema={"name": str(index)}) for index in range(5)]})
+        with override_settings(META_SCHEMA_MAX_ENTITIES=3):
+            schema = meta.schema
+        # omitted objects are removed from lists
+        self.assertEqual([item["name"] for item in schema["items"]], ["0", "1"])
+        meta = Meta(
+            schema={
+                "items": [Meta(schema={"name": str(index)}) for index in range(5)],
+                "item": Meta(schema={"name": "item"}),
+            }
+        )
+        with override_settings(META_SCHEMA_MAX_ENTITIES=3):
+            json_ld = json.loads(meta.as_json_ld())
+        self.assertEqual([item["name"] for item in json_ld["items"]], ["0", "1"])
+        self.assertIsNone(json_ld["item"])
+
+    def test_no_limits(self):
+        meta = Meta(schema={"items": [Meta(schema={"name": str(index)}) for index in range(1500)]})
+        self.assertEqual(len(meta.schema["items"]), 1500)
+        self.assertEqual(self.get_chain(20).schema["name"], "19")
+
+    def test_handlers(self):
+        meta = Meta(schema={"price": Decimal("1.50"), "date": date(2020, 1, 2), "tags": ("a", "b")})
+        self.assertEqual(
+            meta.schema, {"price": Decimal("1.50"), "date": "2020-01-02", "tags": ["a", "b"], "@type": "Article"}
+        )
+        register_schema_handler(Decimal)(lambda builder, value, depth: str(value))
+        try:
+            self.assertEqual(Meta(schema={"price": Decimal("1.50")}).schema["price"], "1.50")
+            self.assertIsNotNone(get_schema_handler(type("Price", (Decimal,), {})))
+        finally:
+            _handlers.pop(Decimal)
+            _class_handlers.clear()
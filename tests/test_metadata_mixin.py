@@ -256,7 +256,8 @@ class MetadataMixinTestCase(TestCase):
         self.assertEqual(meta_object.url, "http://foo.com/some/path")
         self.assertEqual(meta_object.keywords, ["foo", "bar"])
         self.assertEqual(meta_object.image, "http://foo.com/static/images/foo.gif")
-        self.assertEqual(meta_object.image_object, media)
+        self.assertEqual(meta_object.image_object, full_url_media)
+        self.assertEqual(media["url"], "images/foo.gif")
 
     def test_get_context(self):
         media = {
@@ -292,3 +293,34 @@ class MetadataMixinTestCase(TestCase):
             self.assertEqual(context["meta"].keywords, ["foo", "bar"])
             self.assertEqual(context["meta"].image, "https://foo.com/static/images/foo.gif")
             self.assertEqual(context["meta"].image_object, full_url_media)
+
+    @override_settings(
+        META_SITE_PROTOCOL="http",
+        META_SITE_DOMAIN="foo.com",
+        META_PRUNE_FIELDS=True,
+        META_USE_OG_PROPERTIES=False,
+        META_USE_TWITTER_PROPERTIES=True,
+        META_USE_JSON_LD_SCHEMA=False,
+    )
+    def test_get_meta_prune_fields(self):
+        class View(MetadataMixin):
+            title = "title"
+            twitter_site = "@foo"
+            locale = "en_US"
+            schema = {"@type": "Article", "name": "title"}
+
+            def get_meta_locale(self, context=None):
+                raise AssertionError("locale is used by OpenGraph only")
+
+        m = View()
+        self.assertEqual(m.get_meta_outputs(), frozenset({"use_twitter"}))
+        meta = m.get_meta()
+        self.assertEqual(meta.title, "title")
+        self.assertEqual(meta.twitter_site, "@foo")
+        self.assertEqual(meta.locale, None)
+        self.assertNotIn("name", meta.schema)
+
+        m.use_og = True
+        self.assertEqual(m.get_meta_outputs(), frozenset({"use_og", "use_twitter"}))
+        with self.assertRaises(AssertionError):
+            m.get_meta()
@@ -1,18 +1,37 @@
+import json
+import pickle
+import threading
+import time
 import warnings
 from datetime import timedelta
+from unittest.mock import PropertyMock, patch
 
 from app_helper.base_test import BaseTestCase
+from asgiref.sync import async_to_sync
+from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+from django.db.models import Count, Prefetch, QuerySet
+from django.template import Context, Template
 from django.test.utils import override_settings
 from django.utils import timezone
 
-from meta.models import ModelMeta
+from meta.cache import fragment_cache, get_cache_context, schema_cache
+from meta.graph import JsonLdGraph
+from meta.models import ModelMeta, Related, RelatedItems, _compile_accessor, _plans
 from meta.settings import get_setting
 from meta.templatetags.meta_extra import generic_prop, googleplus_html_scope
+from meta.utils import schema_scope
+from meta.views import CompactMeta, LazyMeta, Meta
 
 from .example_app.models import Comment, Post, Publisher
 
 
+def dumps(data, default=None):
+    return json.dumps(data, default=default, separators=(",", ":")).encode("utf-8")
+
+
 class TestMeta(BaseTestCase):
     post = None
 
@@ -494,3 +513,751 @@ class TestMeta(BaseTestCase):
 
     def test_get_author_schemaorg(self):
         self.assertEqual(self.post.get_author_schemaorg(), "https://schemaorg-profile.com")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_resolution_plan(self):
+        self.assertIs(Post._get_plan("metadata"), Post._get_plan("metadata"))
+        self.assertIs(Post._get_plan("schema"), Post._get_plan("schema"))
+        accessors = {field: accessor for field, __, accessor in Post._get_plan("metadata")}
+        self.assertEqual(accessors["twitter_site"](self.post, "twitter_site"), "@FooBlag")
+        self.assertEqual(accessors["twitter_title"](self.post, "twitter_title"), "twitter title")
+        self.assertEqual(accessors["other_prop"](self.post, "other_prop"), "get_other_prop")
+        self.assertEqual(accessors["extra_props"](self.post, "extra_props"), {"key": "val"})
+        self.assertEqual(accessors["title"](self.post, "title"), "a title")
+        self.assertEqual(accessors["published_time"](self.post, "published_time"), self.post.date_published)
+        self.assertEqual(accessors["description"](self.post, "description"), "post meta")
+        self.assertEqual(accessors["false_prop"](self.post, "false_prop"), False)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_resolution_plan_single_call(self):
+        post = Post.objects.get(pk=self.post.pk)
+        with patch.object(Post, "get_description", autospec=True, return_value="patched") as get_description:
+            meta = post.as_meta()
+        self.assertEqual(meta.description, "patched")
+        self.assertEqual(meta.schema["description"], "patched")
+        # description, og_description and schema description, never called with the field name
+        self.assertEqual(get_description.call_count, 3)
+        for call in get_description.call_args_list:
+            self.assertEqual(call.args, (post,))
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_resolution_plan_skip_empty(self):
+        fields = [field for field, __, __ in Publisher._get_plan("metadata")]
+        self.assertNotIn("title", fields)
+        self.assertNotIn("twitter_site", fields)
+        with override_settings(META_TWITTER_SITE="@publisher"):
+            fields = [field for field, __, __ in Publisher._get_plan("metadata")]
+            self.assertIn("twitter_site", fields)
+            self.assertEqual(self.publisher.as_meta().twitter_site, "@publisher")
+        fields = [field for field, __, __ in Publisher._get_plan("metadata")]
+        self.assertNotIn("twitter_site", fields)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_metadata_default_copy(self):
+        # Post copies ModelMeta._metadata_default: defaults provided by the settings follow them
+        self.assertNotIn("og_app_id", [field for field, __, __ in Post._get_plan("metadata")])
+        with override_settings(META_FB_APPID="123456"):
+            self.assertEqual(Post._get_metadata_default()["og_app_id"], "123456")
+            self.assertEqual(Post._get_metadata_default()["locale"], "dummy_locale")
+            self.assertIn(("og_app_id", "123456"), [entry[:2] for entry in Post._get_plan("metadata")])
+        self.assertNotIn("og_app_id", [field for field, __, __ in Post._get_plan("metadata")])
+        self.assertFalse(ModelMeta._metadata_default["og_app_id"])
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_as_meta_many(self):
+        posts = []
+        for idx in range(4):
+            post = Post.objects.create(
+                title="post {}".format(idx), slug="post-{}".format(idx), abstract="abstract", publisher=self.publisher
+            )
+            Comment.objects.create(body="comment {}".format(idx), post=post)
+            posts.append(post.pk)
+        self.assertEqual(Post._get_relation_names(), ["publisher", "comments", "related_posts"])
+        Site.objects.get_current()
+        # posts, publishers, comments, related posts
+        with self.assertNumQueries(4):
+            metas = Post.as_meta_many(Post.objects.filter(pk__in=posts).order_by("pk"))
+            schemas = [meta.schema for meta in metas]
+        self.assertEqual(len(metas), 4)
+        for idx, (meta, schema) in enumerate(zip(metas, schemas)):
+            self.assertEqual(meta.title, "post {}".format(idx))
+            self.assertEqual(schema["comment"], [{"@type": "Comment", "text": "comment {}".format(idx)}])
+            self.assertEqual(schema["commentCount"], 1)
+            self.assertEqual(schema["publisher"]["name"], "publisher name")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_load_deferred_fields(self):
+        post = Post.objects.defer("title", "og_title", "text", "meta_description").get(pk=self.post.pk)
+        refresh = Post.refresh_from_db
+        with patch.object(Post, "refresh_from_db", autospec=True, side_effect=refresh) as refresh_from_db:
+            with self.assertLogs("meta.models", "WARNING") as logs:
+                meta = post.as_meta()
+            refresh_from_db.assert_any_call(post, fields={"title", "og_title", "text"})
+            # meta_description is read by get_description method
+            self.assertEqual(refresh_from_db.call_count, 2)
+        self.assertIn("og_title, text, title", logs.output[0])
+        self.assertEqual(meta.title, "a title")
+        self.assertEqual(meta.og_title, "og title")
+        self.assertEqual(meta.schema["articleBody"], "post text")
+
+        post = Post.objects.defer("title", "meta_description").get(pk=self.post.pk)
+        with patch.object(Post, "_metadata_fields", ("meta_description",)):
+            with patch.object(Post, "refresh_from_db", autospec=True, side_effect=refresh) as refresh_from_db:
+                with self.assertLogs("meta.models", "WARNING"):
+                    meta = post.as_meta()
+                refresh_from_db.assert_called_once_with(post, fields={"title", "meta_description"})
+        self.assertEqual(meta.description, "post meta")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_load_deferred_fields_many(self):
+        posts = (
+            Post.objects.defer("title", "og_title").filter(pk__in=[self.post.pk, self.related_post.pk]).order_by("pk")
+        )
+        with patch.object(Post, "refresh_from_db") as refresh_from_db:
+            with self.assertLogs("meta.models", "WARNING") as logs:
+                metas = Post.as_meta_many(posts)
+            refresh_from_db.assert_not_called()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("og_title, title of 2 example_app.Post objects", logs.output[0])
+        self.assertEqual([meta.og_title for meta in metas], ["og title", "related og title"])
+
+    def test_related_lookups(self):
+        select_related, prefetch_related = Post._get_related_lookups()
+        self.assertEqual(select_related, ["publisher"])
+        self.assertEqual(
+            [getattr(lookup, "prefetch_to", lookup) for lookup in prefetch_related],
+            [
+                "comments",
+                "related_posts",
+                "related_posts__publisher",
+                "related_posts__comments",
+                "related_posts__related_posts",
+            ],
+        )
+        # comments are only included in the schema: only the fields used by their schema are loaded
+        for lookup in (prefetch_related[0], prefetch_related[3]):
+            self.assertIsInstance(lookup, Prefetch)
+            self.assertEqual(lookup.queryset.query.deferred_loading, ({"body", "id", "post_id"}, False))
+        select_related, prefetch_related = Post._get_related_lookups(max_depth=1)
+        self.assertEqual(select_related, ["publisher"])
+        self.assertEqual(prefetch_related[0].prefetch_to, "comments")
+        self.assertEqual(prefetch_related[1], "related_posts")
+        self.assertEqual(Comment._get_related_lookups(), ([], []))
+
+    def test_schema_fields(self):
+        self.assertEqual(Comment._get_schema_fields(), ("body",))
+        # methods and properties are used
+        self.assertIsNone(Post._get_schema_fields())
+        self.assertIsNone(Publisher._get_schema_fields())
+        with patch.object(Publisher, "_schema_fields", ("name",)):
+            _plans.clear()
+            self.addCleanup(_plans.clear)
+            self.assertEqual(Publisher._get_schema_fields(), ("name",))
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_schema_fields_projection(self):
+        with patch.object(Post, "_schema", {"@type": "Article", "name": "title", "citation": "related_posts"}):
+            _plans.clear()
+            self.addCleanup(_plans.clear)
+            self.assertEqual(Post._get_schema_fields(), ("title",))
+            post = Post.objects.get(pk=self.post.pk)
+            with self.assertNumQueries(1):
+                related = post.schema["citation"]
+            self.assertIn("text", related[0].get_deferred_fields())
+            self.assertNotIn("title", related[0].get_deferred_fields())
+            # related posts of the related post
+            with self.assertNumQueries(1):
+                schema = post.as_schema()
+            self.assertEqual(schema["citation"], [{"@type": "Article", "name": "related title", "citation": []}])
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_with_meta(self):
+        queryset = Post.objects.with_meta()
+        self.assertEqual(queryset.query.select_related, {"publisher": {}})
+        self.assertEqual(queryset._prefetch_related_lookups[0].prefetch_to, "comments")
+
+        Site.objects.get_current()
+        # posts with publisher, comments, related posts and their publisher, comments, related posts
+        with self.assertNumQueries(6):
+            post = Post.objects.with_meta().select_related("author").get(pk=self.post.pk)
+            schema = post.as_meta().schema
+        self.assertEqual(schema["comment"], [{"@type": "Comment", "text": "comment body"}])
+        self.assertEqual(schema["citation"][0]["name"], "related title")
+
+    def test_related_items_async_prefetched(self):
+        accessor = _compile_accessor(Post, "comments")
+        post = Post.objects.prefetch_related("comments").get(pk=self.post.pk)
+        # prefetched objects are read as they are, without iterating the queryset in a worker thread
+        with patch.object(QuerySet, "__aiter__", autospec=True, side_effect=QuerySet.__aiter__) as aiter:
+            with self.assertNumQueries(0):
+                self.assertEqual(async_to_sync(accessor.aresolve)(post, "comment"), [self.comment])
+        aiter.assert_not_called()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(async_to_sync(accessor.aresolve)(post, "comment"), [self.comment])
+
+    def patch_related_comments(self, **kwargs):
+        schema = dict(Post._schema, comment=Related("comments", **kwargs))
+        patcher = patch.object(Post, "_schema", schema)
+        patcher.start()
+        _plans.clear()
+        self.addCleanup(_plans.clear)
+        self.addCleanup(patcher.stop)
+        for idx in range(4):
+            Comment.objects.create(body="comment {}".format(idx), post=self.post)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_related(self):
+        self.patch_related_comments(limit=2, ordering=("-pk",), only=("body",))
+        post = Post.objects.get(pk=self.post.pk)
+        items = post.schema["comment"]
+        self.assertIsInstance(items, RelatedItems)
+        self.assertEqual(items.queryset.query.deferred_loading, ({"body", "post_id"}, False))
+        self.assertEqual(items.queryset.query.high_mark, 2)
+        with patch.object(items.queryset, "iterator", wraps=items.queryset.iterator) as iterator:
+            schema = post.as_meta().schema
+            iterator.assert_called_once_with(chunk_size=100)
+        self.assertEqual(
+            schema["comment"], [{"@type": "Comment", "text": "comment 3"}, {"@type": "Comment", "text": "comment 2"}]
+        )
+        self.assertEqual(
+            json.loads(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld())["comment"], schema["comment"]
+        )
+        self.assertEqual(pickle.loads(pickle.dumps(items)), list(items))
+        self.assertEqual(Post._get_relation_names(), ["publisher", "comments", "related_posts"])
+
+    def test_related_items_single_query(self):
+        self.patch_related_comments(limit=3, ordering=("pk",))
+        items = Post.objects.get(pk=self.post.pk).schema["comment"]
+        template = Template("{% if items %}{% for item in items %}{{ item.body }},{% endfor %}{% endif %}")
+        with self.assertNumQueries(1):
+            self.assertTrue(items)
+            self.assertEqual(template.render(Context({"items": items})), "comment body,comment 0,comment 1,")
+            self.assertEqual([item.body for item in items], [item.body for item in items])
+        empty = RelatedItems(Comment.objects.none())
+        self.assertFalse(empty)
+        self.assertEqual(list(empty), [])
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_related_prefetch(self):
+        self.patch_related_comments(limit=2, ordering=("-pk",), only=("body",))
+        lookups = Post._get_related_lookups(max_depth=1)[1]
+        self.assertIsInstance(lookups[0], Prefetch)
+        self.assertEqual(lookups[0].prefetch_through, "comments")
+        self.assertEqual(lookups[0].to_attr, "_meta_prefetched_comments")
+        self.assertEqual(lookups[1], "related_posts")
+        Site.objects.get_current()
+        # as in test_with_meta, plus the comments count of each post, as the whole comments are not fetched
+        with self.assertNumQueries(8):
+            post = Post.objects.with_meta().select_related("author").get(pk=self.post.pk)
+            schema = post.as_meta().schema
+        self.assertEqual([item["text"] for item in schema["comment"]], ["comment 3", "comment 2"])
+        self.assertEqual(schema["commentCount"], 5)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_related_async(self):
+        self.patch_related_comments(limit=3, ordering=("pk",))
+        schema = async_to_sync(Post.objects.get(pk=self.post.pk).aas_schema)()
+        self.assertEqual([item["text"] for item in schema["comment"]], ["comment body", "comment 0", "comment 1"])
+
+    def patch_comment_count(self):
+        schema = dict(Post._schema, comment=Related("comments", limit=2), commentCount=Count("comments"))
+        patcher = patch.object(Post, "_schema", schema)
+        patcher.start()
+        _plans.clear()
+        self.addCleanup(_plans.clear)
+        self.addCleanup(patcher.stop)
+        for idx in range(4):
+            Comment.objects.create(body="comment {}".format(idx), post=self.post)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_aggregate(self):
+        self.patch_comment_count()
+        self.assertEqual(Post._get_aggregates(), {"meta_schema_commentCount": Count("comments")})
+        self.assertEqual(Comment._get_aggregates(), {})
+        post = Post.objects.get(pk=self.post.pk)
+        accessor = next(entry[2] for entry in Post._get_plan("schema") if entry[0] == "commentCount")
+        # not annotated: computed with one query, then reused
+        with self.assertNumQueries(1):
+            self.assertEqual(accessor(post, "commentCount"), 5)
+            self.assertEqual(accessor(post, "commentCount"), 5)
+        post = Post.objects.with_meta().get(pk=self.post.pk)
+        self.assertEqual(post.meta_schema_commentCount, 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(accessor(post, "commentCount"), 5)
+        self.assertEqual(async_to_sync(Post.objects.get(pk=self.post.pk).aas_schema)()["commentCount"], 5)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_aggregate_prefetch(self):
+        self.patch_comment_count()
+        # related posts are annotated as well
+        lookup = Post._get_related_lookups(max_depth=1)[1][1]
+        self.assertEqual(lookup.prefetch_to, "related_posts")
+        self.assertIn("meta_schema_commentCount", lookup.queryset.query.annotations)
+        Site.objects.get_current()
+        # as in test_related_prefetch, without the comments count of each post
+        with self.assertNumQueries(6):
+            post = Post.objects.with_meta().select_related("author").get(pk=self.post.pk)
+            schema = post.as_meta().schema
+        self.assertEqual(schema["commentCount"], 5)
+        self.assertEqual(schema["citation"][0]["commentCount"], 0)
+        posts = list(Post.objects.filter(pk__in=[self.post.pk, self.related_post.pk]).order_by("pk"))
+        metas = Post.as_meta_many(posts)
+        # aggregates are computed for all the objects in one query
+        with self.assertNumQueries(0):
+            self.assertEqual([post.meta_schema_commentCount for post in posts], [5, 0])
+        self.assertEqual(metas[0].schema["commentCount"], 5)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_USE_CACHE=True)
+    def test_aggregate_as_meta_many_cache(self):
+        self.patch_comment_count()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        Post.objects.get(pk=self.related_post.pk).as_meta()
+        posts = list(Post.objects.filter(pk__in=[self.post.pk, self.related_post.pk]).order_by("pk"))
+        with patch.object(QuerySet, "aggregate", autospec=True) as aggregate:
+            metas = Post.as_meta_many(posts)
+        # computed for the object missing from the cache in one query, the other one is not annotated
+        aggregate.assert_not_called()
+        self.assertEqual(posts[0].meta_schema_commentCount, 5)
+        self.assertNotIn("meta_schema_commentCount", posts[1].__dict__)
+        self.assertEqual(metas[0].schema["commentCount"], 5)
+        self.assertEqual(metas[1].schema["commentCount"], 0)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_aggregate_multiple_relations(self):
+        self.patch_comment_count()
+        schema = dict(Post._schema, citationCount=Count("related_posts"))
+        with patch.object(Post, "_schema", schema):
+            _plans.clear()
+            for idx in range(2):
+                self.post.related_posts.add(
+                    Post.objects.create(title="post {}".format(idx), slug="post-{}".format(idx), author=self.user)
+                )
+            # aggregates over different relations must not multiply each other
+            post = Post.objects.with_meta().get(pk=self.post.pk)
+            self.assertEqual((post.meta_schema_commentCount, post.meta_schema_citationCount), (5, 3))
+            posts = list(Post.objects.filter(pk=self.post.pk))
+            Post.as_meta_many(posts)
+            self.assertEqual((posts[0].meta_schema_commentCount, posts[0].meta_schema_citationCount), (5, 3))
+            schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+            self.assertEqual((schema["commentCount"], schema["citationCount"]), (5, 3))
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_schema_not_stale(self):
+        self.assertEqual(self.post.as_meta().schema["citation"][0]["name"], "related title")
+        Post.objects.filter(pk=self.related_post.pk).update(title="changed title")
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.as_meta().schema["citation"][0]["name"], "changed title")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_schema_scope(self):
+        other_post = Post.objects.create(title="other title", slug="other-title", publisher=self.publisher)
+        logo = Meta(schema={"@type": "ImageObject", "url": "http://example.com/some/logo.png"})
+        with patch.object(Publisher, "static_logo", new_callable=PropertyMock, return_value=logo) as static_logo:
+            with schema_scope() as memo:
+                first = self.post.as_meta().schema
+                self.assertIn(self.publisher._local_key, memo.schemas)
+                # publisher schema is resolved once
+                second = Post.objects.get(pk=other_post.pk).as_meta().schema
+                static_logo.assert_called_once_with()
+                self.assertIs(first["publisher"], second["publisher"])
+                self.assertFalse(memo.visiting)
+            Post.objects.get(pk=other_post.pk).as_meta().schema
+            self.assertEqual(static_logo.call_count, 2)
+        with schema_scope() as memo:
+            self.assertEqual(memo.schemas, {})
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_CACHE_SIZE=3)
+    def test_schema_cache(self):
+        context = get_cache_context()
+        self.post.as_meta().schema
+        # publisher, comment, related post, post: publisher is discarded as the least recently used
+        self.assertEqual(len(schema_cache._data), 3)
+        self.assertIsNone(schema_cache.get(self.publisher._local_key, context))
+        self.assertEqual(schema_cache.get(self.post._local_key, context)["name"], "a title")
+        with override_settings(META_SCHEMA_CACHE_SIZE=10):
+            self.post.as_meta().schema
+            self.assertEqual(len(schema_cache._data), 4)
+            self.assertEqual(schema_cache.get(self.publisher._local_key, context)["name"], "publisher name")
+            Comment.objects.create(body="other comment", post=self.related_post)
+            # post includes the related post: it's discarded as well
+            self.assertEqual(len(schema_cache._data), 2)
+            self.assertIsNone(schema_cache.get(self.related_post._local_key, context))
+            self.assertIsNone(schema_cache.get(self.post._local_key, context))
+            self.publisher.name = "new name"
+            self.publisher.save()
+            self.assertIsNone(schema_cache.get(self.publisher._local_key, context))
+            self.assertEqual(len(schema_cache._data), 1)
+        with override_settings(META_SCHEMA_CACHE_SIZE=0):
+            self.assertEqual(len(schema_cache._data), 0)
+
+    @override_settings(
+        META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_CACHE_SIZE=10, META_CACHE_TIMEOUT=60
+    )
+    def test_schema_cache_timeout(self):
+        context = get_cache_context()
+        with patch("meta.cache.monotonic", return_value=1000):
+            self.post.as_meta().schema
+        # changed in another process: not invalidated by signals
+        Publisher.objects.filter(pk=self.publisher.pk).update(name="new name")
+        with patch("meta.cache.monotonic", return_value=1059):
+            self.assertEqual(schema_cache.get(self.publisher._local_key, context)["name"], "publisher name")
+        with patch("meta.cache.monotonic", return_value=1060):
+            self.assertIsNone(schema_cache.get(self.publisher._local_key, context))
+            schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+        self.assertEqual(schema["publisher"]["name"], "new name")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_CACHE_SIZE=10)
+    def test_schema_cache_dependencies(self):
+        context = get_cache_context()
+        self.related_post.publisher = self.publisher
+        self.related_post.save()
+        self.assertEqual(Post.objects.get(pk=self.post.pk).as_meta().schema["publisher"]["name"], "publisher name")
+        json_ld = json.loads(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld())
+        self.assertEqual(json_ld["citation"][0]["publisher"]["name"], "publisher name")
+        __, dependencies = schema_cache.get_entry(self.post._local_key, context)
+        self.assertEqual(
+            dependencies,
+            {self.publisher._local_key, self.related_post._local_key, self.comment._local_key},
+        )
+        self.assertIn(self.publisher._local_key, fragment_cache.get_entry(self.related_post._local_key, context)[1])
+        publisher = Publisher.objects.get(pk=self.publisher.pk)
+        publisher.name = "new name"
+        publisher.save()
+        # objects including the publisher, directly or through other objects, are discarded
+        self.assertIsNone(schema_cache.get(self.post._local_key, context))
+        self.assertIsNone(schema_cache.get(self.related_post._local_key, context))
+        self.assertIsNone(fragment_cache.get(self.related_post._local_key, context))
+        self.assertEqual(schema_cache.get(self.comment._local_key, context)["text"], "comment body")
+        schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+        self.assertEqual(schema["publisher"]["name"], "new name")
+        self.assertEqual(schema["citation"][0]["publisher"]["name"], "new name")
+        json_ld = json.loads(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld())
+        self.assertEqual(json_ld["citation"][0]["publisher"]["name"], "new name")
+
+    @override_settings(
+        META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_CACHE_SIZE=10, META_SCHEMA_MAX_ENTITIES=2
+    )
+    def test_schema_partial(self):
+        context = get_cache_context()
+        with schema_scope() as memo:
+            schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+            self.assertEqual(schema["publisher"]["name"], "publisher name")
+            self.assertIsNone(schema["publisher"]["logo"])
+            # logo is omitted: publisher schema and the post one including it are partial
+            self.assertNotIn(self.publisher._local_key, memo.schemas)
+            self.assertNotIn(self.post._local_key, memo.schemas)
+            json_ld = json.loads(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld())
+            self.assertIsNone(json_ld["publisher"]["logo"])
+            self.assertNotIn(self.publisher._local_key, memo.fragments)
+        self.assertIsNone(schema_cache.get(self.publisher._local_key, context))
+        self.assertIsNone(schema_cache.get(self.post._local_key, context))
+        self.assertIsNone(fragment_cache.get(self.publisher._local_key, context))
+        self.assertEqual(self.publisher.as_schema()["logo"]["@type"], "ImageObject")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_CACHE_SIZE=10)
+    def test_schema_partial_cycle(self):
+        context = get_cache_context()
+        self.related_post.related_posts.add(self.post)
+        with schema_scope() as memo:
+            schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+            self.assertEqual(schema["citation"][0]["citation"], [None])
+            # related post schema lacks the pointer back to the post, post schema is complete
+            self.assertNotIn(self.related_post._local_key, memo.schemas)
+            self.assertIs(memo.schemas[self.post._local_key], schema)
+        self.assertIsNone(schema_cache.get(self.related_post._local_key, context))
+        schema = Post.objects.get(pk=self.related_post.pk).as_meta().schema
+        self.assertEqual(schema["citation"][0]["name"], "a title")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_MAX_DEPTH=1)
+    def test_schema_max_depth(self):
+        schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+        self.assertEqual(schema["publisher"]["name"], "publisher name")
+        self.assertIsNone(schema["publisher"]["logo"])
+        self.assertEqual(schema["citation"][0]["name"], "related title")
+        json_ld = json.loads(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld())
+        self.assertIsNone(json_ld["publisher"]["logo"])
+        with override_settings(META_SCHEMA_MAX_DEPTH=0):
+            schema = Post.objects.get(pk=self.post.pk).as_meta().schema
+            self.assertIsNone(schema["publisher"])
+            self.assertEqual(schema["citation"], [])
+            self.assertEqual(schema["name"], "a title")
+            json_ld = json.loads(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld())
+            self.assertIsNone(json_ld["publisher"])
+            self.assertEqual(json_ld["citation"], [])
+            self.assertEqual(json_ld["comment"], [])
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_MAX_DEPTH=1)
+    def test_schema_max_depth_async(self):
+        meta = async_to_sync(Post.objects.get(pk=self.post.pk).aas_meta)()
+        self.assertIsNone(meta.schema["publisher"]["logo"])
+        self.assertEqual(meta.schema, Post.objects.get(pk=self.post.pk).as_meta().schema)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_as_schema(self):
+        self.assertEqual(self.post.as_schema(), Post.objects.get(pk=self.post.pk).as_meta().schema)
+        self.assertEqual(self.related_post.as_schema()["@type"], "Article")
+        self.assertEqual(self.comment.as_schema(), {"@type": "Comment", "text": "comment body"})
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_nested_schema_skips_metadata(self):
+        with patch.object(Post, "get_image_object", autospec=True, return_value=None) as get_image_object:
+            schema = self.post.as_meta().schema
+        self.assertEqual(schema["citation"][0]["name"], "related title")
+        get_image_object.assert_called_once_with(self.post)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_slow_providers(self):
+        # providers return their value only if they are running at the same time
+        barrier = threading.Barrier(2, timeout=2)
+
+        def slow(value):
+            def provider(instance):
+                try:
+                    barrier.wait()
+                except threading.BrokenBarrierError:
+                    return None
+                return value
+
+            return provider
+
+        with patch.object(Post, "get_image_width", autospec=True, side_effect=slow(100)), patch.object(
+            Post, "get_image_height", autospec=True, side_effect=slow(200)
+        ), patch.object(Post, "_metadata_slow", {"image_width": 5, "image_height": None}):
+            meta = self.post.as_meta()
+        self.assertEqual(meta.image_width, 100)
+        self.assertEqual(meta.image_height, 200)
+        self.assertEqual(meta.title, "a title")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_slow_providers_database(self):
+        def provider(instance):
+            return Site.objects.count()
+
+        with patch.object(Post, "get_image_width", autospec=True, side_effect=provider), patch.object(
+            Post, "_metadata_slow", {"image_width": 5}
+        ), patch("meta.models.close_old_connections", wraps=close_old_connections) as close:
+            meta = self.post.as_meta()
+            self.assertEqual(meta.image_width, 1)
+            # connections are closed before and after running the provider
+            self.assertEqual(close.call_count, 2)
+            self.assertEqual(self.post.as_meta(lazy=True).image_width, 1)
+            self.assertEqual(close.call_count, 4)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_slow_providers_timeout(self):
+        def provider(instance):
+            time.sleep(0.3)
+            return 100
+
+        with patch.object(Post, "get_image_width", autospec=True, side_effect=provider), patch.object(
+            Post, "_metadata_slow", {"image_width": 0.05}
+        ):
+            meta = self.post.as_meta()
+            self.assertIsNone(meta.image_width)
+            with patch.dict(Post._metadata_default, {"image_width": 50}):
+                meta = self.post.as_meta()
+            self.assertEqual(meta.image_width, 50)
+        self.assertEqual(meta.image_height, 600)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_lazy_meta(self):
+        fields = [field for field, __, __ in Post._get_plan("metadata")] + [
+            "og_title",
+            "twitter_title",
+            "schemaorg_title",
+            "og_description",
+            "twitter_description",
+            "schemaorg_description",
+            "schema",
+        ]
+        meta = self.post.as_meta()
+        lazy_meta = self.post.as_meta(lazy=True)
+        self.assertIsInstance(lazy_meta, LazyMeta)
+        for field in fields:
+            self.assertEqual(getattr(lazy_meta, field), getattr(meta, field), field)
+        self.assertEqual(lazy_meta._pending, {})
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_lazy_meta_json_ld(self):
+        schema = self.post.as_meta().schema
+        lazy_meta = self.post.as_meta(lazy=True)
+        self.assertEqual(json.loads(lazy_meta.as_json_ld()), {"@context": "http://schema.org", **schema})
+        context = Context({"meta": self.post.as_meta(lazy=True)})
+        output = Template('{% include "meta/meta.html" %}').render(context)
+        self.assertIn('"name": "a title"', output)
+        self.assertIn('"headline": "post abstract"', output)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_lazy_meta_json_ld_graph(self):
+        graph = JsonLdGraph()
+        graph.add(self.post.as_meta(lazy=True))
+        nodes = {node["@id"]: node for node in graph.as_dict()["@graph"]}
+        post_id = self.post.get_json_ld_id()
+        self.assertEqual(nodes[post_id]["name"], "a title")
+        self.assertEqual(nodes[post_id]["publisher"], {"@id": self.publisher.get_json_ld_id()})
+        self.assertEqual(nodes[self.publisher.get_json_ld_id()]["name"], "publisher name")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_LAZY=True)
+    def test_lazy_meta_deferred(self):
+        with patch.object(Post, "get_description", autospec=True, return_value="patched") as get_description:
+            meta = self.post.as_meta()
+            self.assertEqual(meta.title, "a title")
+            get_description.assert_not_called()
+            # twitter_description falls back to description
+            self.assertEqual(meta.twitter_description, "patched")
+            get_description.assert_called_once_with(self.post)
+            self.assertEqual(meta.description, "patched")
+            get_description.assert_called_once_with(self.post)
+        meta.description = "overridden"
+        self.assertEqual(meta.description, "overridden")
+        self.assertNotIsInstance(self.post.as_meta(lazy=False), LazyMeta)
+
+    @override_settings(
+        META_SITE_PROTOCOL="http",
+        META_USE_SITES=True,
+        META_PRUNE_FIELDS=True,
+        META_USE_OG_PROPERTIES=True,
+        META_USE_TWITTER_PROPERTIES=False,
+        META_USE_SCHEMAORG_PROPERTIES=False,
+        META_USE_JSON_LD_SCHEMA=False,
+    )
+    def test_prune_fields(self):
+        fields = [field for field, __, __ in self.post._get_output_plan()[0]]
+        self.assertIn("og_description", fields)
+        self.assertIn("image_width", fields)
+        self.assertNotIn("twitter_title", fields)
+        self.assertNotIn("schemaorg_description", fields)
+        self.assertIs(self.post._get_output_plan()[0], self.post._get_output_plan()[0])
+        with patch.object(Post, "get_schema_author", autospec=True) as get_schema_author:
+            meta = self.post.as_meta()
+        get_schema_author.assert_not_called()
+        self.assertEqual(meta.og_description, "post meta")
+        self.assertEqual(meta.title, "a title")
+        self.assertEqual(meta.twitter_site, None)
+        self.assertEqual(meta.schema, {"@type": get_setting("SCHEMAORG_TYPE")})
+        with override_settings(META_USE_TWITTER_PROPERTIES=True, META_USE_JSON_LD_SCHEMA=True):
+            meta = self.post.as_meta()
+            self.assertEqual(meta.twitter_site, "@FooBlag")
+            self.assertEqual(meta.schema, self.post.as_meta(lazy=True).schema)
+            self.assertEqual(meta.schema["author"], self.post.get_schema_author())
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_compact_meta_class(self):
+        meta = self.post.as_meta()
+        with patch.object(Post, "_meta_class", CompactMeta):
+            compact_meta = self.post.as_meta()
+        self.assertIsInstance(compact_meta, CompactMeta)
+        for field in ("title", "og_title", "description", "url", "image", "twitter_site", "other_prop", "schema"):
+            self.assertEqual(getattr(compact_meta, field), getattr(meta, field), field)
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_as_json_ld_single_pass(self):
+        expected = json.loads(self.post.as_meta().as_json_ld())
+        meta = Post.objects.get(pk=self.post.pk).as_meta()
+        self.assertEqual(json.loads(meta.as_json_ld()), expected)
+        self.assertIsNone(meta._schema_data)
+        self.assertEqual(expected["datePublished"], self.post.date_published.isoformat())
+        self.assertEqual(expected["comment"][0]["text"], "comment body")
+        self.assertEqual(meta.schema, {key: value for key, value in expected.items() if key != "@context"})
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_as_json_ld_fragments(self):
+        meta = Post.objects.get(pk=self.post.pk).as_meta()
+        meta.schema
+        expected = meta.as_json_ld()
+        with schema_scope() as memo:
+            self.assertEqual(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld(), expected)
+            self.assertEqual(json.loads(memo.fragments[self.publisher._local_key])["name"], "publisher name")
+            self.assertEqual(
+                json.loads(memo.fragments[self.comment._local_key]), {"@type": "Comment", "text": "comment body"}
+            )
+            with patch.object(Publisher, "as_schema") as as_schema:
+                self.assertEqual(Post.objects.get(pk=self.post.pk).as_meta().as_json_ld(), expected)
+                as_schema.assert_not_called()
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_CACHE_SIZE=10)
+    def test_as_json_ld_fragment_cache(self):
+        context = get_cache_context()
+        self.post.as_meta().as_json_ld()
+        self.assertEqual(json.loads(fragment_cache.get(self.publisher._local_key, context))["name"], "publisher name")
+        fragment_cache.set(self.publisher._local_key, context, '{"@type": "Organization", "name": "cached"}')
+        json_ld = Post.objects.get(pk=self.post.pk).as_meta().as_json_ld()
+        self.assertIn('"publisher": {"@type": "Organization", "name": "cached"}', json_ld)
+        self.publisher.save()
+        self.assertIsNone(fragment_cache.get(self.publisher._local_key, context))
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_JSON_LD_ENCODER="tests.test_mixin.dumps")
+    def test_json_ld_encoder(self):
+        json_ld = self.post.as_meta().as_json_ld()
+        self.assertIsInstance(json_ld, str)
+        self.assertNotIn(": ", json_ld)
+        with override_settings(META_JSON_LD_ENCODER="tests.missing.dumps"):
+            with self.assertWarns(RuntimeWarning):
+                self.assertEqual(self.post.as_meta().as_json_ld(), json.dumps(json.loads(json_ld)))
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_json_ld_id(self):
+        self.assertEqual(self.post.get_json_ld_id(), "http://example.com/title/#post")
+        self.assertEqual(self.publisher.get_json_ld_id(), "#{}".format(self.publisher._local_key))
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_json_ld_graph(self):
+        self.related_post.publisher = self.publisher
+        self.related_post.save()
+        graph = JsonLdGraph()
+        graph.add(self.post.as_meta())
+        graph.add(self.related_post.as_meta())
+        graph.add(self.post.as_meta())
+        data = json.loads(graph.as_json_ld())
+        self.assertEqual(data["@context"], "http://schema.org")
+        nodes = {node["@id"]: node for node in data["@graph"]}
+        self.assertEqual(len(nodes), len(data["@graph"]))
+        post_id = self.post.get_json_ld_id()
+        publisher_id = self.publisher.get_json_ld_id()
+        self.assertEqual(
+            set(nodes),
+            {post_id, self.related_post.get_json_ld_id(), publisher_id, self.comment.get_json_ld_id()},
+        )
+        self.assertEqual(nodes[post_id]["publisher"], {"@id": publisher_id})
+        self.assertEqual(nodes[self.related_post.get_json_ld_id()]["publisher"], {"@id": publisher_id})
+        self.assertEqual(nodes[post_id]["citation"], [{"@id": self.related_post.get_json_ld_id()}])
+        self.assertEqual(nodes[post_id]["comment"], [{"@id": self.comment.get_json_ld_id()}])
+        self.assertEqual(nodes[post_id]["datePublished"], self.post.date_published.isoformat())
+        self.assertEqual(nodes[publisher_id]["@type"], "Organization")
+        self.assertEqual(nodes[publisher_id]["logo"]["@type"], "ImageObject")
+        self.assertEqual(nodes[self.comment.get_json_ld_id()]["text"], "comment body")
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_SCHEMA_MAX_DEPTH=1)
+    def test_json_ld_graph_limits(self):
+        graph = JsonLdGraph()
+        graph.add(self.post.as_meta())
+        nodes = {node["@id"]: node for node in graph.as_dict()["@graph"]}
+        # publisher is included at depth 1, its logo is omitted
+        self.assertIsNone(nodes[self.publisher.get_json_ld_id()]["logo"])
+        self.assertEqual(len(nodes), 4)
+        with override_settings(META_SCHEMA_MAX_DEPTH=None, META_SCHEMA_MAX_ENTITIES=2):
+            graph = JsonLdGraph()
+            graph.add(self.post.as_meta())
+            nodes = graph.as_dict()["@graph"]
+        self.assertEqual(
+            [node["@id"] for node in nodes], [self.post.get_json_ld_id(), self.publisher.get_json_ld_id()]
+        )
+        self.assertEqual(nodes[0]["comment"], [])
+        self.assertEqual(nodes[0]["citation"], [])
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True, META_JSON_LD_GRAPH=True)
+    def test_as_json_ld_graph(self):
+        data = json.loads(self.post.as_meta().as_json_ld())
+        self.assertEqual(data["@graph"][0]["@id"], self.post.get_json_ld_id())
+        self.assertEqual(data["@graph"][0]["publisher"], {"@id": self.publisher.get_json_ld_id()})
+
+    @override_settings(META_SITE_PROTOCOL="http", META_USE_SITES=True)
+    def test_json_ld_graph_templatetag(self):
+        template = Template("{% load meta %}{% meta_json_ld_graph meta metas %}")
+        context = Context({"meta": self.post.as_meta(), "metas": [self.related_post.as_meta(), self.post.as_meta()]})
+        output = template.render(context)
+        self.assertEqual(output.count("<script"), 1)
+        data = json.loads(output[output.index(">") + 1 : output.rindex("</script>")])
+        self.assertEqual(len(data["@graph"]), 4)
+        self.assertEqual(Template("{% load meta %}{% meta_json_ld_graph metas %}").render(Context({"metas": []})), "")
@@ -0,0 +1,62 @@
+from django.contrib.sites.models import Site
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+
+from meta.sites import clear_site_domains, get_site_domain, warm_site_domains
+from meta.views import Meta
+
+
+@override_settings(META_SITE_PROTOCOL="https", META_USE_SITES=True)
+class SiteDomainTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        clear_site_domains()
+        Site.objects.clear_cache()
+        self.addCleanup(clear_site_domains)
+
+    def test_site_id(self):
+        site = Site.objects.get_current()
+        Site.objects.clear_cache()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_site_domain(), site.domain)
+            Site.objects.clear_cache()
+            self.assertEqual(get_site_domain(), site.domain)
+            self.assertEqual(get_site_domain(RequestFactory().get("/")), site.domain)
+
+    @override_settings(SITE_ID=None, ALLOWED_HOSTS=["*"])
+    def test_host(self):
+        Site.objects.create(domain="other.example.com", name="example")
+        request = RequestFactory().get("/", HTTP_HOST="other.example.com")
+        self.assertEqual(get_site_domain(request), "other.example.com")
+        Site.objects.clear_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_site_domain(RequestFactory().get("/", HTTP_HOST="other.example.com")), "other.example.com"
+            )
+            meta = Meta(request=request, url="/path", image="/image.png")
+            self.assertEqual(meta.domain, "other.example.com")
+
+    @override_settings(SITE_ID=None, ALLOWED_HOSTS=["*"])
+    def test_warm(self):
+        Site.objects.create(domain="other.example.com", name="example")
+        warm_site_domains()
+        Site.objects.clear_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_site_domain(RequestFactory().get("/", HTTP_HOST="Other.example.com")), "other.example.com"
+            )
+            self.assertEqual(
+                get_site_domain(RequestFactory().get("/", HTTP_HOST="other.example.com:8000")), "other.example.com"
+            )
+            with override_settings(SITE_ID=1):
+                self.assertEqual(get_site_domain(), "example.com")
+
+    def test_clear_on_save(self):
+        site = Site.objects.get_current()
+        get_site_domain()
+        site.domain = "changed.example.com"
+        site.save()
+        self.assertEqual(get_site_domain(), "changed.example.com")
+        site.delete()
+        with self.assertRaises(Site.DoesNotExist):
+            get_site_domain()